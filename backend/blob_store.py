@@ -0,0 +1,76 @@
+"""
+Content-Addressed Blob Store
+Keeps long text (student summaries) out of the database records. Each text
+is stored once, zlib-compressed, under the SHA-256 of its content; records
+keep the hash in a `<field>_ref` key and the text is fetched only by the
+endpoints that return it.
+
+Layout:
+    <root>/<first two hex digits>/<sha256>.z
+
+Blobs are immutable, so they can be cached in memory indefinitely and
+shared by every record (and every worker) that holds the same text.
+"""
+
+import hashlib
+import os
+import threading
+import zlib
+from collections import OrderedDict
+
+try:
+    from .db_io import atomic_write
+except ImportError:
+    from db_io import atomic_write
+
+
+class BlobStore:
+    """Immutable text blobs addressed by their SHA-256, with a small LRU cache."""
+
+    def __init__(self, root, fsync=True, cache_size=512):
+        self.root = root
+        self.fsync = fsync
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, digest):
+        return os.path.join(self.root, digest[:2], digest + '.z')
+
+    def _remember(self, digest, text):
+        with self._lock:
+            self._cache[digest] = text
+            self._cache.move_to_end(digest)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def put(self, text):
+        """Store `text` and return its digest (a no-op if it is already stored)."""
+        data = text.encode('utf-8')
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._path(digest)
+        if not os.path.exists(path):
+            atomic_write(path, zlib.compress(data), fsync=self.fsync)
+        self._remember(digest, text)
+        return digest
+
+    def get(self, digest):
+        """Return the text stored under `digest`, or None if it is missing."""
+        with self._lock:
+            text = self._cache.get(digest)
+            if text is not None:
+                self._cache.move_to_end(digest)
+                return text
+        try:
+            with open(self._path(digest), 'rb') as f:
+                text = zlib.decompress(f.read()).decode('utf-8')
+        except FileNotFoundError:
+            return None
+        self._remember(digest, text)
+        return text
+
+    def disk_usage(self):
+        total = 0
+        for directory, _, files in os.walk(self.root):
+            total += sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+        return total
@@ -0,0 +1,140 @@
+"""
+Resource Catalog
+Indexes the NLP resources once at load so endpoints can look them up in
+O(1) instead of scanning the list: by id, by module, by normalized title,
+plus the module order used for module_scores vectors.
+
+The catalog holds the same resource dicts as the list it was built from,
+so later enrichment (e.g. youtube_url) is visible through every index.
+
+It also caches the static polar geometry of the grid (each resource's
+angle and radius around POLAR_ORIGIN) and the "Peak Potential" high line
+derived from it, so /api/polylines only scales the cached radii.
+"""
+
+import hashlib
+import json
+import math
+from functools import cached_property
+
+import numpy as np
+
+try:
+    from . import radial_mapper
+except ImportError:
+    import radial_mapper
+
+# Polylines are drawn radially around the bottom-left grid corner
+POLAR_ORIGIN = (0.0, 19.0)
+
+
+def normalize_title(text):
+    """Case- and whitespace-insensitive key for titles and module names."""
+    return ' '.join(str(text).split()).lower()
+
+
+class ResourceCatalog:
+    """Read-only indexes over the resource list (built once, shared by all endpoints)."""
+
+    def __init__(self, resources):
+        self.resources = resources
+        self.by_id = {}
+        self.by_module = {}
+        self.by_title = {}
+        self.by_module_name = {}
+        self.ordered_modules = []
+        for r in resources:
+            self.by_id.setdefault(str(r['id']).strip(), r)
+            self.by_title.setdefault(normalize_title(r['title']), r)
+            module = r['module']
+            self.by_module_name.setdefault(normalize_title(module), r)
+            if module not in self.by_module:
+                self.by_module[module] = []
+                self.ordered_modules.append(module)
+            self.by_module[module].append(r)
+        # module -> position in module_scores vectors
+        self.module_index = {m: i for i, m in enumerate(self.ordered_modules)}
+        self._build_polar_geometry()
+
+    def _build_polar_geometry(self):
+        """Resources in angle order with their radius, cos/sin and module row; the high line built from them."""
+        ox, oy = POLAR_ORIGIN
+
+        def angle(r):
+            return math.atan2(oy - r['position']['y'], r['position']['x'] - ox)
+
+        self.polar_order = sorted(self.resources, key=angle)
+        radii, cos_t, sin_t = [], [], []
+        for r in self.polar_order:
+            dx = r['position']['x'] - ox
+            dy = oy - r['position']['y']
+            theta = math.atan2(dy, dx)
+            radii.append(math.hypot(dx, dy))
+            # math.cos/sin (not np.cos/sin) so cached paths match the scalar formulas exactly
+            cos_t.append(math.cos(theta))
+            sin_t.append(math.sin(theta))
+        self.polar_radii = np.array(radii, dtype=np.float64)
+        self.polar_cos = np.array(cos_t, dtype=np.float64)
+        self.polar_sin = np.array(sin_t, dtype=np.float64)
+        self.polar_module_rows = np.array([self.module_index[r['module']] for r in self.polar_order], dtype=np.intp)
+
+        # Peak Potential: each resource's high_line share of its radius
+        self.high_line_scores = [float(self.first_in_module(m).get('high_line', 0.8)) for m in self.ordered_modules]
+        hl = np.array([float(r.get('high_line', 0.8)) for r in self.polar_order], dtype=np.float64)
+        self.high_line_path = self._closed_path(self.polar_radii * hl)
+        self.high_line_assimilation = radial_mapper.polyline_to_grid(
+            self.high_line_scores, num_topics=len(self.ordered_modules)
+        )
+
+    def _closed_path(self, scaled_radii):
+        ox, oy = POLAR_ORIGIN
+        xs = (ox + scaled_radii * self.polar_cos).tolist()
+        ys = (oy - scaled_radii * self.polar_sin).tolist()
+        path = [{'x': x, 'y': y} for x, y in zip(xs, ys)]
+        if path:
+            path.append(path[0])
+        return path
+
+    def polar_path(self, module_scores=None):
+        """Closed path placing every resource at module_scores[its module] x its radius (all at the origin if None)."""
+        if module_scores is None:
+            scale = np.zeros(len(self.polar_order), dtype=np.float64)
+        else:
+            scale = np.asarray(module_scores, dtype=np.float64)[self.polar_module_rows]
+        return self._closed_path(self.polar_radii * scale)
+
+    @cached_property
+    def version(self):
+        """Content hash of the resources, for ETags (first computed after load-time enrichment)."""
+        data = json.dumps(self.resources, sort_keys=True, default=str).encode('utf-8')
+        return hashlib.sha256(data).hexdigest()[:16]
+
+    def __len__(self):
+        return len(self.resources)
+
+    def __iter__(self):
+        return iter(self.resources)
+
+    def get(self, resource_id):
+        """Resource with exactly this id (ids are strings), or None."""
+        if not isinstance(resource_id, str):
+            return None
+        return self.by_id.get(resource_id)
+
+    def first_in_module(self, module):
+        """First resource of a module in catalog order, or None."""
+        resources = self.by_module.get(module)
+        return resources[0] if resources else None
+
+    def by_name(self, name):
+        """Resource whose title or module matches `name` after normalization, or None."""
+        key = normalize_title(name)
+        return self.by_title.get(key) or self.by_module_name.get(key)
+
+    def split_visited(self, ids):
+        """(visited, unvisited) resources in catalog order; ids are matched after str().strip()."""
+        wanted = set(str(v).strip() for v in ids)
+        visited, unvisited = [], []
+        for r in self.resources:
+            (visited if str(r['id']).strip() in wanted else unvisited).append(r)
+        return visited, unvisited
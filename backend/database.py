@@ -1,9 +1,29 @@
-import json
+import hashlib
 import os
+import time
+import uuid
 from datetime import datetime
 
+try:
+    from .json_store import JSONStore
+    from .blob_store import BlobStore
+    from . import polyline_stats
+    from . import session_archive
+except ImportError:
+    from json_store import JSONStore
+    from blob_store import BlobStore
+    import polyline_stats
+    import session_archive
+
 # HF Native Persistence: Check if /data volume is mounted
 def get_db_file_path():
+    # Explicit override (tests, benchmarks, custom deployments)
+    if os.getenv('DB_PATH'):
+        path = os.path.abspath(os.getenv('DB_PATH'))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        print(f"[ENV] Persistence: Active. Storing data in {path}")
+        return path
+
     # Primary choice: HF Persistent Storage Mount
     if os.path.exists('/data'):
         # Use a subdirectory to avoid permission issues at the root mount point
@@ -18,7 +38,7 @@ def get_db_file_path():
             return test_path
         except Exception as e:
             print(f"[WARN] HF Native Persistence: (/data) exists but is not writable: {e}")
-    
+
     # Fallback: Local Storage
     local_path = os.path.join(os.path.dirname(__file__), 'data', 'db.json')
     os.makedirs(os.path.dirname(local_path), exist_ok=True)
@@ -30,180 +50,510 @@ DB_FILE = get_db_file_path()
 # Ensure final data directory exists
 os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
 
+# Storage engine: 'json' (default, single db.json document), 'sqlite'
+# or 'sharded' (one file per session)
+DB_ENGINE = os.getenv('DB_ENGINE', 'json').strip().lower()
+SQLITE_FILE = os.path.splitext(DB_FILE)[0] + '.sqlite3'
+SHARD_DIR = os.path.join(os.path.dirname(DB_FILE), 'shards')
+
+# JSON engine: write mutations to an append-only journal folded into db.json
+# by a background compactor (set DB_JOURNAL=0 to rewrite db.json on every write)
+DB_JOURNAL = os.getenv('DB_JOURNAL', '1') != '0'
+DB_COMPACT_INTERVAL = float(os.getenv('DB_COMPACT_INTERVAL', '10'))
+DB_FSYNC = os.getenv('DB_FSYNC', '1') != '0'
+# JSON engine: serve reads from an in-memory parsed copy of db.json
+DB_CACHE = os.getenv('DB_CACHE', '1') != '0'
+# JSON engine: snapshot encoding, 'json' (indented), 'json-compact' or 'msgpack'.
+# The format of an existing file is detected on load.
+DB_FORMAT = os.getenv('DB_FORMAT', 'json')
+# Retention: newest notifications kept per session (0 = unlimited), and the
+# idle time after which `db_admin.py archive` moves a session to ARCHIVE_DIR
+DB_MAX_NOTIFICATIONS = int(os.getenv('DB_MAX_NOTIFICATIONS', '100'))
+DB_ARCHIVE_AFTER_DAYS = float(os.getenv('DB_ARCHIVE_AFTER_DAYS', '30'))
+ARCHIVE_DIR = os.path.join(os.path.dirname(DB_FILE), 'archive')
+# Long text fields of summaries / polylines are kept in a content-addressed
+# blob store; records only hold '<field>_ref' hashes
+BLOB_DIR = os.path.join(os.path.dirname(DB_FILE), 'blobs')
+DB_BLOB_MIN_CHARS = int(os.getenv('DB_BLOB_MIN_CHARS', '256'))
+OFFLOADED_FIELDS = ('summary',)
+# JSON engine: concurrent writes arriving within this window share one commit
+DB_GROUP_COMMIT_MS = float(os.getenv('DB_GROUP_COMMIT_MS', '2'))
+# Change log entries kept per session (and for cross-session events) for /api/sync;
+# trimmed back to this when the JSON journal is compacted, or at twice it (SQLite, shards)
+DB_SYNC_LOG_SIZE = int(os.getenv('DB_SYNC_LOG_SIZE', '500'))
+# /api/sync tokens trail the clock by this much, so writes still committing are sent next time
+DB_SYNC_LAG_MS = float(os.getenv('DB_SYNC_LAG_MS', '5000'))
+
+
+def create_store(engine=None):
+    """
+    Build the storage engine used by the helpers below.
+
+    Every engine exposes the same primitives (get_session / put_session,
+    get_polylines / put_polyline, add_summary, set_bookmarks, add_note,
+    transaction(), load_all / save_all, ...), so the public functions in
+    this module keep their signatures whatever backend is configured.
+    """
+    engine = (engine or DB_ENGINE)
+    if engine == 'sqlite':
+        try:
+            from .sqlite_store import SQLiteStore
+        except ImportError:
+            from sqlite_store import SQLiteStore
+        print(f"[DB] Engine: sqlite ({SQLITE_FILE})")
+        return SQLiteStore(SQLITE_FILE, change_log_size=DB_SYNC_LOG_SIZE)
+    if engine == 'sharded':
+        try:
+            from .shard_store import ShardedStore
+        except ImportError:
+            from shard_store import ShardedStore
+        print(f"[DB] Engine: sharded ({SHARD_DIR})")
+        return ShardedStore(SHARD_DIR, fsync=DB_FSYNC, change_log_size=DB_SYNC_LOG_SIZE)
+    if engine != 'json':
+        print(f"[WARN] Unknown DB_ENGINE '{engine}', falling back to json")
+    return JSONStore(DB_FILE, journal=DB_JOURNAL, compact_interval=DB_COMPACT_INTERVAL,
+                     fsync=DB_FSYNC, cache=DB_CACHE, group_commit_ms=DB_GROUP_COMMIT_MS, fmt=DB_FORMAT,
+                     change_log_size=DB_SYNC_LOG_SIZE)
+
+
+_store = create_store()
+_store.init()
+_blobs = BlobStore(BLOB_DIR, fsync=DB_FSYNC)
+
+
+def _new_session_state(notification_id, message):
+    return {
+        'position': {'x': 10, 'y': 10},
+        'level': 0,
+        'totalReward': 0,
+        'visitedResources': [],
+        'notifications': [
+            {
+              'id': notification_id,
+              'type': 'info',
+              'message': message,
+              'timestamp': int(datetime.now().timestamp() * 1000),
+              'read': False
+            }
+        ]
+    }
+
 def init_db():
-    if not os.path.exists(DB_FILE):
-        data = {
-            "users": [],
-            "learning_sessions": {},
-            "polylines": {},
-            "summaries": [],
-            "bookmarks": {},  # session_id -> list of resource_ids
-            "notes": {},      # session_id -> list of note objects
-            "lectures": []    # list of lecture objects
-        }
-        save_db(data)
+    _store.init()
 
 def reset_db():
-    if os.path.exists(DB_FILE):
-        os.remove(DB_FILE)
-    init_db()
+    _store.reset()
 
 def load_db():
-    if not os.path.exists(DB_FILE):
-        init_db()
-    
-    try:
-        with open(DB_FILE, 'r') as f:
-            content = f.read().strip()
-            if not content:
-                init_db()
-                with open(DB_FILE, 'r') as f2:
-                    db = json.load(f2)
-            else:
-                db = json.loads(content)
-                
-            if "bookmarks" not in db:
-                db["bookmarks"] = {}
-                save_db(db)
-            return db
-    except (json.JSONDecodeError, FileNotFoundError):
-        init_db()
-        with open(DB_FILE, 'r') as f:
-            return json.load(f)
+    """Return the whole database in the db.json document layout."""
+    return _store.load_all()
 
 def save_db(data):
-    # Ensure directory exists (in case /data was just mounted)
-    os.makedirs(os.path.dirname(DB_FILE), exist_ok=True)
-    with open(DB_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
+    # Derived data is rebuilt lazily from the new content
+    _store.save_all({k: v for k, v in data.items() if k != 'meta'})
+
+def compact_db():
+    """Fold pending journal records into the db.json snapshot (JSON engine only)."""
+    compact = getattr(_store, 'compact', None)
+    return compact() if compact else 0
+
+def get_cache_stats():
+    """Read-cache counters of the active engine (hits, misses, journal tail replays)."""
+    stats = getattr(_store, 'cache_stats', None)
+    return dict(stats(), engine=_store.name) if stats else {'engine': _store.name}
 
 def get_session(session_id):
-    db = load_db()
-    if session_id not in db["learning_sessions"]:
-        db["learning_sessions"][session_id] = {
-            'position': {'x': 10, 'y': 10},
-            'level': 0,
-            'totalReward': 0,
-            'visitedResources': [],
-            'notifications': [
-                { 
-                  'id': 'initial', 
-                  'type': 'info', 
-                  'message': 'Welcome back to the Intelligence Hub. Neural Sync complete.', 
-                  'timestamp': int(datetime.now().timestamp() * 1000), 
-                  'read': False 
-                }
-            ]
-        }
-        save_db(db)
-    return db["learning_sessions"][session_id]
+    session = _store.get_session(session_id)
+    if session is None and restore_session(session_id):
+        session = _store.get_session(session_id)
+    if session is None:
+        session = _new_session_state('initial', 'Welcome back to the Intelligence Hub. Neural Sync complete.')
+        with _store.transaction():
+            _store.put_session(session_id, session)
+            _record_change(session_id, changes=_session_changes({}, session))
+    return session
 
 def update_session(session_id, session_data):
-    db = load_db()
-    db["learning_sessions"][session_id] = session_data
-    save_db(db)
+    notifications = session_data.get('notifications')
+    if DB_MAX_NOTIFICATIONS and notifications and len(notifications) > DB_MAX_NOTIFICATIONS:
+        # Newest first (add_notification prepends)
+        session_data['notifications'] = notifications[:DB_MAX_NOTIFICATIONS]
+    with _store.transaction():
+        changes = _session_changes(_store.get_session(session_id) or {}, session_data)
+        _store.put_session(session_id, session_data)
+        _record_change(session_id, changes=changes)
 
-def save_summary(summary_data):
-    db = load_db()
-    if "summaries" not in db:
-        db["summaries"] = []
-    db["summaries"].append(summary_data)
-    save_db(db)
+def offload_text(record):
+    """Copy of `record` whose long text fields are replaced by blob references (unchanged records are returned as is)."""
+    offloaded = None
+    for field in OFFLOADED_FIELDS:
+        text = record.get(field)
+        if isinstance(text, str) and len(text) >= DB_BLOB_MIN_CHARS:
+            if offloaded is None:
+                offloaded = dict(record)
+            offloaded[field + '_ref'] = _blobs.put(text)
+            del offloaded[field]
+    return offloaded if offloaded is not None else record
 
-def save_polyline(polyline_id, polyline_data):
-    db = load_db()
-    db["polylines"][polyline_id] = polyline_data
-    save_db(db)
+def hydrate_text(record):
+    """Copy of a stored record with its blob references resolved back into text."""
+    hydrated = dict(record)
+    for field in OFFLOADED_FIELDS:
+        ref = hydrated.pop(field + '_ref', None)
+        if ref is not None:
+            hydrated[field] = _blobs.get(ref)
+    return hydrated
 
-def get_polylines():
+def offload_existing_text():
+    """
+    Move inline long text of already stored records into the blob store.
+    Only the changed records are rewritten (the text they serve is the same,
+    so versions and the change log are left alone). Returns the number of
+    records changed.
+    """
     db = load_db()
-    return db["polylines"]
+    owners = db.get('polyline_sessions', {})
+    polylines = {}
+    for polyline_id, polyline in db.get('polylines', {}).items():
+        offloaded = offload_text(polyline)
+        if offloaded is not polyline:
+            polylines[polyline_id] = offloaded
+    summaries = {}
+    for summary in db.get('summaries', []):
+        offloaded = offload_text(summary)
+        if offloaded is not summary:
+            summaries[summary.get('id', '')] = offloaded
+    if polylines or summaries:
+        with _store.transaction():
+            for polyline_id, polyline in polylines.items():
+                _store.put_polyline(polyline_id, polyline, session_id=owners.get(polyline_id))
+            _store.update_summaries(summaries)
+    return len(polylines) + len(summaries)
+
+def save_summary(summary_data, session_id=None):
+    summary_data = offload_text(summary_data)
+    with _store.transaction():
+        _store.add_summary(summary_data, session_id=session_id)
+        _record_change(session_id or 'default')
+
+POLYLINE_STATS_KEY = polyline_stats.META_KEY
+
+def _load_polyline_stats(session_id=None):
+    """Stored running stats of one scope, rebuilt from its polylines if missing. Call inside a transaction."""
+    stats = _store.get_meta(POLYLINE_STATS_KEY, session_id=session_id)
+    if not polyline_stats.is_current(stats):
+        stats = polyline_stats.build_stats(_store.get_polylines(session_id=session_id).values())
+        _store.put_meta(POLYLINE_STATS_KEY, stats, session_id=session_id)
+    return stats
+
+def _remove_from_global_stats(removed):
+    """Subtract removed polylines ({id: record}) from the global running stats. Call inside a transaction."""
+    stats = _store.get_meta(POLYLINE_STATS_KEY)
+    if removed and polyline_stats.is_current(stats):
+        # Unset stats are built on the next read, already without them
+        _store.put_meta(POLYLINE_STATS_KEY,
+                        polyline_stats.remove_stats(stats, polyline_stats.build_stats(removed.values())))
+
+def get_polyline_stats(session_id=None):
+    """Running per-module sum / count / max and keyword counts of all polylines, or of one session's."""
+    stats = _store.get_meta(POLYLINE_STATS_KEY, session_id=session_id)
+    if not polyline_stats.is_current(stats):
+        with _store.transaction():
+            stats = _load_polyline_stats(session_id)
+    return stats
+
+def save_polyline(polyline_id, polyline_data, session_id=None):
+    polyline_data = offload_text(polyline_data)
+    with _store.transaction():
+        owner, old = _store.find_polyline(polyline_id, session_id=session_id)
+        old_counted = (polyline_stats.scores_of(old), polyline_stats.keywords_of(old))
+        new_counted = (polyline_stats.scores_of(polyline_data), polyline_stats.keywords_of(polyline_data))
+        _store.put_polyline(polyline_id, polyline_data, session_id=session_id)
+        scopes = (session_id or owner or 'default', None)
+        if new_counted != old_counted:
+            if old_counted == (None, []):
+                # New polyline: only the delta is written (unset stats are built on the next read, with it)
+                for scope in scopes:
+                    _store.add_polyline_stats(*new_counted, session_id=scope)
+            else:
+                # Scores of an existing polyline changed: a max cannot be decremented, rebuilt on the next read
+                for scope in scopes:
+                    _store.put_meta(POLYLINE_STATS_KEY, None, session_id=scope)
+        # else: no change to the stats (e.g. a visibility toggle)
+        _record_change(scopes[0], polylines=True, changes=[('polyline', polyline_id)])
+
+def get_polylines(session_id=None):
+    """All polylines, or only those of one session (served from the session index)."""
+    return _store.get_polylines(session_id=session_id)
+
+def find_polylines(polyline_ids):
+    """The stored polylines among `polyline_ids`, looked up one by one (ids that no longer exist are skipped)."""
+    found = {}
+    for polyline_id in polyline_ids:
+        _, polyline = _store.find_polyline(polyline_id)
+        if polyline is not None:
+            found[polyline_id] = polyline
+    return found
+
+def get_summaries(session_id=None, since=None):
+    """Summaries in creation order, optionally of one session and/or newer than `since` (ms)."""
+    return _store.get_summaries(session_id=session_id, since=since)
 
 def get_bookmarks(session_id):
-    db = load_db()
-    return db["bookmarks"].get(session_id, [])
+    bookmarks = _store.get_bookmarks(session_id)
+    if bookmarks is None and restore_session(session_id):
+        bookmarks = _store.get_bookmarks(session_id)
+    return bookmarks or []
 
 def add_bookmark(session_id, resource_id):
-    db = load_db()
-    if session_id not in db["bookmarks"]:
-        db["bookmarks"][session_id] = []
-    if resource_id not in db["bookmarks"][session_id]:
-        db["bookmarks"][session_id].append(resource_id)
-        save_db(db)
+    with _store.transaction():
+        bookmarks = _store.get_bookmarks(session_id) or []
+        if resource_id not in bookmarks:
+            _store.set_bookmarks(session_id, bookmarks + [resource_id])
+            _record_change(session_id, changes=[('bookmarks', None)])
 
 def remove_bookmark(session_id, resource_id):
-    db = load_db()
-    if session_id in db["bookmarks"] and resource_id in db["bookmarks"][session_id]:
-        db["bookmarks"][session_id].remove(resource_id)
-        save_db(db)
+    with _store.transaction():
+        bookmarks = _store.get_bookmarks(session_id) or []
+        if resource_id in bookmarks:
+            _store.set_bookmarks(session_id, [b for b in bookmarks if b != resource_id])
+            _record_change(session_id, changes=[('bookmarks', None)])
 
 def get_notes(session_id):
-    db = load_db()
-    if "notes" not in db or isinstance(db["notes"], list):
-        db["notes"] = {}
-        save_db(db)
-    return db["notes"].get(session_id, [])
+    notes = _store.get_notes(session_id)
+    if not notes and restore_session(session_id):
+        notes = _store.get_notes(session_id)
+    return notes
 
 def add_note(session_id, note_data):
-    db = load_db()
-    if "notes" not in db or isinstance(db["notes"], list):
-        db["notes"] = {}
-    if session_id not in db["notes"]:
-        db["notes"][session_id] = []
-    
     # Simple ID generation if not provided
     if "id" not in note_data:
         note_data["id"] = f"note_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
     if "createdAt" not in note_data:
         note_data["createdAt"] = datetime.now().isoformat()
-        
-    db["notes"][session_id].append(note_data)
-    save_db(db)
+
+    with _store.transaction():
+        _store.add_note(session_id, note_data)
+        _record_change(session_id, changes=[('note', note_data['id'])])
     return note_data
 
 def get_lectures():
-    db = load_db()
-    return db.get("lectures", [])
+    return _store.get_lectures()
 
 def reset_session_data(session_id):
     """Resets all progress, rewards, polylines and summaries for a specific session."""
-    db = load_db()
-    
-    # 1. Reset session state
-    db["learning_sessions"][session_id] = {
-        'position': {'x': 10, 'y': 10},
-        'level': 0,
-        'totalReward': 0,
-        'visitedResources': [],
-        'notifications': [
-            { 
-              'id': f'reset_{int(datetime.now().timestamp())}', 
-              'type': 'info', 
-              'message': 'Intelligence Journey restarted. System recalibrated.', 
-              'timestamp': int(datetime.now().timestamp() * 1000), 
-              'read': False 
-            }
-        ]
+    with _store.transaction():
+        # 1. Reset session state
+        session = _new_session_state(f'reset_{int(datetime.now().timestamp())}',
+                                     'Intelligence Journey restarted. System recalibrated.')
+        _store.put_session(session_id, session)
+
+        # 2. Clear polylines related to this session (including current_average)
+        removed = _store.delete_session_polylines(session_id)
+        _store.put_meta(POLYLINE_STATS_KEY, polyline_stats.empty_stats(), session_id=session_id)
+        _remove_from_global_stats(removed)
+
+        # 3. Clear summaries for this session
+        _store.delete_session_summaries(session_id)
+
+        # 4. Clear bookmarks for this session
+        if _store.get_bookmarks(session_id):
+            _store.set_bookmarks(session_id, [])
+        _record_change(session_id, polylines=True,
+                       changes=[('reset', None)] + [('polyline_deleted', pid) for pid in removed])
+
+    return session
+
+
+# =============================================
+# DATA VERSIONS (conditional GETs)
+# =============================================
+
+# Every write stamps a version on the session it touched (and, for polyline
+# writes, its polyline version) and appends what changed to that session's
+# bounded change log, as one store op. Versions are a hybrid logical clock:
+# wall-clock microseconds, bumped past the scope's previous version, so
+# sessions never share a counter and /api/sync can compare them with a
+# point in time. The cross-session scope only logs archive deletions.
+# reset_db / save_db wipe meta, so versions are qualified by a random
+# per-generation epoch.
+EPOCH_KEY = 'epoch'
+POLYLINE_CHANGE_KINDS = ('polyline', 'polyline_deleted')
+
+def _session_changes(old, new):
+    """('session', field) and ('notification', id) entries for the differences between two session states."""
+    fields = [k for k in dict.fromkeys(list(old) + list(new))
+              if k != 'notifications' and old.get(k) != new.get(k)]
+    old_notifications = {n.get('id'): n for n in old.get('notifications') or []}
+    notification_ids = dict.fromkeys(n.get('id') for n in new.get('notifications') or []
+                                     if old_notifications.get(n.get('id')) != n)
+    return [('session', k) for k in fields] + [('notification', nid) for nid in notification_ids]
+
+def _record_change(session_id=None, polylines=False, changes=()):
+    """
+    Stamp a new version on a session (None: the cross-session scope) and log
+    `changes` ((kind, id) pairs) with it. Call inside a transaction.
+    """
+    seq = max(time.time_ns() // 1000, _store.get_version(session_id) + 1)
+    _store.log_change(seq, changes, polylines=polylines, session_id=session_id)
+    return seq
+
+def data_epoch():
+    """Random id of the current database generation (new after reset_db / save_db)."""
+    epoch = _store.get_meta(EPOCH_KEY)
+    if epoch is None:
+        with _store.transaction():
+            epoch = _store.get_meta(EPOCH_KEY)
+            if epoch is None:
+                epoch = uuid.uuid4().hex[:16]
+                _store.put_meta(EPOCH_KEY, epoch)
+    return epoch
+
+def data_version(session_id=None):
+    """
+    '<epoch>.<version>' of the last write to a session's data, or
+    (session_id=None) a digest of every session's polyline version.
+    """
+    if session_id is not None:
+        return f"{data_epoch()}.{_store.get_version(session_id)}"
+    versions = sorted((sid or '', version) for sid, version in _store.polyline_versions().items())
+    return f"{data_epoch()}.{hashlib.sha256(repr(versions).encode('utf-8')).hexdigest()[:16]}"
+
+def sync_watermark():
+    """
+    Point in version time a /api/sync response covers. It trails the clock
+    by DB_SYNC_LAG_MS: a write whose version was taken earlier but that is
+    still committing is sent again by the next sync instead of being skipped.
+    """
+    return time.time_ns() // 1000 - int(DB_SYNC_LAG_MS * 1000)
+
+def changes_since(since, session_id=None):
+    """
+    (kind, id) pairs logged after version `since`, oldest first: one
+    session's changes, or (session_id=None) the polyline changes of every
+    session. None when a log no longer reaches back that far and the caller
+    has to resync in full.
+    """
+    if session_id is not None:
+        entries, complete = _store.changes_since(since, [session_id])
+    else:
+        entries, complete = _store.changes_since(since)
+        entries = [e for e in entries if e[1] in POLYLINE_CHANGE_KINDS]
+    return [(kind, key) for _, kind, key in entries] if complete else None
+
+
+# =============================================
+# RETENTION / COLD ARCHIVE
+# =============================================
+
+LAST_ACTIVE_KEY = 'last_active'
+
+def _last_active(session_id, session):
+    """
+    Last write to the session (ms), read off its version clock (or the
+    'last_active' meta older stores kept); sessions older than both fall
+    back to their newest notification.
+    """
+    last_active = max(_store.get_version(session_id) // 1000,
+                      _store.get_meta(LAST_ACTIVE_KEY, session_id=session_id) or 0)
+    if not last_active:
+        last_active = max((n.get('timestamp') or 0 for n in session.get('notifications', [])), default=0)
+    return last_active
+
+def archive_session(session_id):
+    """Move one session out of the hot store into a compressed archive file."""
+    with _store.transaction():
+        session = _store.get_session(session_id)
+        if session is None:
+            return False
+        bundle = {
+            'session_id': session_id,
+            'session': session,
+            'polylines': _store.get_polylines(session_id=session_id),
+            'summaries': _store.get_summaries(session_id=session_id),
+            'bookmarks': _store.get_bookmarks(session_id),
+            'notes': _store.get_notes(session_id),
+            'last_active': _last_active(session_id, session),
+            'archived_at': int(time.time() * 1000),
+        }
+        # The archive is durable before the hot copy goes away
+        session_archive.write_archive(ARCHIVE_DIR, session_id, bundle)
+        _store.delete_session(session_id)
+        if bundle['polylines']:
+            _remove_from_global_stats(bundle['polylines'])
+            _record_change(polylines=True, changes=[('polyline_deleted', pid) for pid in bundle['polylines']])
+    return True
+
+def restore_session(session_id):
+    """Bring an archived session back into the hot store. Returns False when there is no archive."""
+    if not session_archive.has_archive(ARCHIVE_DIR, session_id):
+        return False
+    with _store.transaction():
+        # Another worker may have restored it while we waited for the lock
+        bundle = session_archive.read_archive(ARCHIVE_DIR, session_id)
+        if bundle is None:
+            return False
+        # Merge rather than overwrite: the learner may have written since the archive was made
+        if _store.get_session(session_id) is None:
+            _store.put_session(session_id, bundle['session'])
+        global_stats = _store.get_meta(POLYLINE_STATS_KEY)
+        existing = _store.get_polylines(session_id=session_id)
+        restored = []
+        for polyline_id, polyline in bundle['polylines'].items():
+            if polyline_id not in existing:
+                _store.put_polyline(polyline_id, polyline, session_id=session_id)
+                restored.append(('polyline', polyline_id))
+                if polyline_stats.is_current(global_stats):
+                    polyline_stats.add_polyline(global_stats, polyline_stats.scores_of(polyline),
+                                                polyline_stats.keywords_of(polyline))
+        if restored and polyline_stats.is_current(global_stats):
+            _store.put_meta(POLYLINE_STATS_KEY, global_stats)
+        _store.put_meta(POLYLINE_STATS_KEY, None, session_id=session_id)
+        summary_ids = {s.get('id') for s in _store.get_summaries(session_id=session_id)}
+        for summary in bundle['summaries']:
+            if summary.get('id') not in summary_ids:
+                _store.add_summary(summary, session_id=session_id)
+        if bundle['bookmarks']:
+            bookmarks = _store.get_bookmarks(session_id) or []
+            _store.set_bookmarks(session_id, bookmarks + [b for b in bundle['bookmarks'] if b not in bookmarks])
+        note_ids = {n.get('id') for n in _store.get_notes(session_id)}
+        for note in bundle['notes']:
+            if note.get('id') not in note_ids:
+                _store.add_note(session_id, note)
+        _record_change(session_id, polylines=bool(restored), changes=[('reset', None)] + restored)
+        session_archive.remove_archive(ARCHIVE_DIR, session_id)
+    print(f"[DB] Restored archived session {session_id}")
+    return True
+
+def archive_idle_sessions(days=None, dry_run=False):
+    """Archive every session idle for more than `days` (default DB_ARCHIVE_AFTER_DAYS). Returns their ids."""
+    days = DB_ARCHIVE_AFTER_DAYS if days is None else days
+    cutoff = (time.time() - days * 86400) * 1000
+    archived = []
+    for session_id in _store.session_ids():
+        session = _store.get_session(session_id)
+        if session is None or _last_active(session_id, session) >= cutoff:
+            continue
+        if dry_run or archive_session(session_id):
+            archived.append(session_id)
+    return archived
+
+def storage_report():
+    """Sizes of the hot store and of the cold archive."""
+    cold = session_archive.archived_sessions(ARCHIVE_DIR)
+    return {
+        'engine': _store.name,
+        'hot': {
+            'sessions': len(_store.session_ids()),
+            'polylines': len(_store.get_polylines()),
+            'summaries': len(_store.get_summaries()),
+            'bytes': _store.disk_usage(),
+        },
+        'cold': {
+            'sessions': len(cold),
+            'bytes': sum(size for _, size in cold),
+        },
+        'blobs': {
+            'bytes': _blobs.disk_usage(),
+        },
     }
-    
-    # 2. Clear polylines related to this session (including current_average)
-    # We remove the average polyline and any session-specific polylines
-    keys_to_remove = ['current_average']
-    for k in list(db["polylines"].keys()):
-        if f"_{session_id}_" in k or k.startswith(f"polyline_{session_id}"):
-            keys_to_remove.append(k)
-    
-    for k in keys_to_remove:
-        if k in db["polylines"]:
-            del db["polylines"][k]
-            
-    # 3. Clear summaries for this session
-    if "summaries" in db:
-        db["summaries"] = [s for s in db["summaries"] if session_id not in s.get("id", "")]
-        
-    # 4. Clear bookmarks for this session
-    if "bookmarks" in db and session_id in db["bookmarks"]:
-        db["bookmarks"][session_id] = []
-        
-    save_db(db)
-    return db["learning_sessions"][session_id]
@@ -0,0 +1,127 @@
+"""
+Database Administration CLI
+Maintenance commands for the learning database.
+
+Usage:
+    python backend/db_admin.py import-sqlite [--json PATH] [--sqlite PATH]
+    python backend/db_admin.py import-shards [--json PATH] [--dir PATH]
+    python backend/db_admin.py compact
+    python backend/db_admin.py archive [--days N] [--dry-run]
+    python backend/db_admin.py restore SESSION_ID
+    python backend/db_admin.py report
+    python backend/db_admin.py offload-text
+"""
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import database
+import shard_store
+import sqlite_store
+
+
+def cmd_import_sqlite(args):
+    json_path = args.json or database.DB_FILE
+    sqlite_path = args.sqlite or database.SQLITE_FILE
+    if not os.path.exists(json_path):
+        print(f"[ERROR] JSON database not found: {json_path}")
+        return 1
+    counts = sqlite_store.import_json_db(json_path, sqlite_path)
+    print(f"[SUCCESS] Imported {json_path} -> {sqlite_path}")
+    print(json.dumps(counts, indent=2))
+    print("Set DB_ENGINE=sqlite to serve from the imported database.")
+    return 0
+
+
+def cmd_import_shards(args):
+    json_path = args.json or database.DB_FILE
+    shard_dir = args.dir or database.SHARD_DIR
+    if not os.path.exists(json_path):
+        print(f"[ERROR] JSON database not found: {json_path}")
+        return 1
+    counts = shard_store.import_json_db(json_path, shard_dir)
+    print(f"[SUCCESS] Split {json_path} -> {shard_dir}")
+    print(json.dumps(counts, indent=2))
+    print("Set DB_ENGINE=sharded to serve from the shards.")
+    return 0
+
+
+def cmd_compact(args):
+    folded = database.compact_db()
+    print(f"[SUCCESS] Folded {folded} journal records into {database.DB_FILE}")
+    return 0
+
+
+def cmd_archive(args):
+    session_ids = database.archive_idle_sessions(days=args.days, dry_run=args.dry_run)
+    if session_ids and not args.dry_run:
+        database.compact_db()  # shrink the hot snapshot now rather than at the next compaction
+    verb = "Would archive" if args.dry_run else "Archived"
+    print(f"[SUCCESS] {verb} {len(session_ids)} idle sessions into {database.ARCHIVE_DIR}")
+    for session_id in session_ids:
+        print(f"  {session_id}")
+    return 0
+
+
+def cmd_restore(args):
+    if not database.restore_session(args.session_id):
+        print(f"[ERROR] No archive for session {args.session_id}")
+        return 1
+    print(f"[SUCCESS] Restored {args.session_id}")
+    return 0
+
+
+def cmd_report(args):
+    print(json.dumps(database.storage_report(), indent=2))
+    return 0
+
+
+def cmd_offload_text(args):
+    changed = database.offload_existing_text()
+    database.compact_db()
+    print(f"[SUCCESS] Moved the summary text of {changed} records into {database.BLOB_DIR}")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Learning database maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("import-sqlite", help="Load an existing db.json into the SQLite engine")
+    p.add_argument("--json", help="Source db.json (default: the configured DB_FILE)")
+    p.add_argument("--sqlite", help="Target SQLite file (default: the configured SQLITE_FILE)")
+    p.set_defaults(func=cmd_import_sqlite)
+
+    p = sub.add_parser("import-shards", help="Split an existing db.json into per-session shards")
+    p.add_argument("--json", help="Source db.json (default: the configured DB_FILE)")
+    p.add_argument("--dir", help="Target shard directory (default: the configured SHARD_DIR)")
+    p.set_defaults(func=cmd_import_shards)
+
+    p = sub.add_parser("compact", help="Fold the mutation journal into the db.json snapshot")
+    p.set_defaults(func=cmd_compact)
+
+    p = sub.add_parser("archive", help="Move idle sessions into compressed per-session archive files")
+    p.add_argument("--days", type=float, help="Idle time before archiving (default: DB_ARCHIVE_AFTER_DAYS)")
+    p.add_argument("--dry-run", action="store_true", help="List the sessions without archiving them")
+    p.set_defaults(func=cmd_archive)
+
+    p = sub.add_parser("restore", help="Bring an archived session back into the hot database")
+    p.add_argument("session_id")
+    p.set_defaults(func=cmd_restore)
+
+    p = sub.add_parser("report", help="Show hot and cold (archived) storage sizes")
+    p.set_defaults(func=cmd_report)
+
+    p = sub.add_parser("offload-text", help="Move inline summary text of existing records into the blob store")
+    p.set_defaults(func=cmd_offload_text)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Low-level file helpers shared by the file-based storage engines.
+"""
+
+import os
+import tempfile
+import threading
+
+try:
+    import fcntl
+except ImportError:  # Windows development machines: thread-level locking only
+    fcntl = None
+
+
+class FileLock:
+    """
+    Advisory exclusive lock on `<path>.lock`, shared by every process that
+    opens the same database (e.g. several gunicorn workers).
+
+    The lock is reentrant for the owning thread and also excludes other
+    threads of this process, so a single FileLock can guard a whole
+    read-modify-write cycle.
+    """
+
+    def __init__(self, path):
+        self.path = path + '.lock'
+        self._guard = threading.RLock()
+        self._depth = 0
+        self._fd = None
+
+    def acquire(self):
+        self._guard.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except BaseException:
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                self._guard.release()
+                raise
+        self._depth += 1
+
+    def release(self):
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._guard.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+def atomic_write(path, data, fsync=True):
+    """
+    Write `data` (str or bytes) to `path` atomically.
+
+    The content goes to a temporary file in the same directory which is then
+    renamed over the target, so readers see either the old or the new file,
+    never a partially written one.
+    """
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    mode = 'wb' if isinstance(data, (bytes, bytearray)) else 'w'
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, mode) as f:
+            f.write(data)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def append_durable(path, data, fsync=True):
+    """Append `data` (str) to `path`, optionally forcing it to disk."""
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write(data)
+        f.flush()
+        if fsync:
+            os.fsync(f.fileno())
@@ -0,0 +1,71 @@
+"""
+Module Embedding Cache
+Persists the normalized module embedding matrix as an .npy file so that
+restarts and every gunicorn worker can skip re-encoding the module
+documents. The file name carries a hash of the model name and the
+preprocessed module texts: editing nlp_resources.json, the coordinates
+CSV or switching models yields a new key and the matrix is recomputed.
+
+Cached matrices are opened memory-mapped (read-only), so workers share
+the same pages. Keys start with a tag of the model name, and saving only
+replaces older matrices of the same model: processes running different
+backends or models against one cache directory keep each other's files.
+"""
+
+import glob
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+
+PREFIX = 'module_embeddings_'
+
+
+def _model_tag(model_name):
+    return hashlib.sha256(model_name.encode('utf-8')).hexdigest()[:12]
+
+
+def cache_key(model_name, modules, texts):
+    """'<model tag>-<hash>' of the model name and the (module, preprocessed text) pairs, in order."""
+    h = hashlib.sha256(model_name.encode('utf-8'))
+    for module, text in zip(modules, texts):
+        h.update(b'\0' + module.encode('utf-8') + b'\0' + text.encode('utf-8'))
+    return f"{_model_tag(model_name)}-{h.hexdigest()[:32]}"
+
+
+def _path(cache_dir, key):
+    return os.path.join(cache_dir, f"{PREFIX}{key}.npy")
+
+
+def load(cache_dir, key, rows):
+    """Return the cached matrix for `key` (memory-mapped), or None if absent or unusable."""
+    try:
+        matrix = np.load(_path(cache_dir, key), mmap_mode='r')
+    except (FileNotFoundError, ValueError, OSError):
+        return None
+    if matrix.ndim != 2 or matrix.shape[0] != rows:
+        return None
+    return matrix
+
+
+def save(cache_dir, key, matrix):
+    """Write the matrix atomically and drop matrices cached under older keys of the same model."""
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _path(cache_dir, key)
+    fd, tmp_path = tempfile.mkstemp(prefix='.' + PREFIX, suffix='.tmp', dir=cache_dir)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, np.ascontiguousarray(matrix, dtype=np.float32))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    model_tag = key.split('-', 1)[0]
+    for old in glob.glob(os.path.join(cache_dir, f"{PREFIX}{model_tag}-*.npy")):
+        if old != path:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
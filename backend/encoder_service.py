@@ -0,0 +1,123 @@
+"""
+Micro-Batching Encoder Service
+Collects encode requests from concurrent request threads and runs them
+through the SentenceTransformer as one batch. A single worker thread takes
+the first waiting text, keeps collecting for up to `window_ms` (or until
+`max_batch` texts are queued), encodes the batch and hands every caller
+its own vector.
+
+Batching only helps when one process serves several requests at once
+(e.g. gunicorn --threads / gthread workers); with a single request in
+flight the cost is at most one window of added latency. window_ms=0
+batches whatever is already queued without waiting.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+
+class EncoderService:
+    """Shared, thread-safe front end to `model.encode` that batches concurrent calls."""
+
+    def __init__(self, model, window_ms=5.0, max_batch=32):
+        self.model = model
+        self.window_ms = window_ms
+        self.max_batch = max(1, int(max_batch))
+        self._queue = queue.Queue()
+        self._worker = None
+        self._start_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "batches": 0,
+            "max_batch_size": 0,
+            "queue_wait_ms_total": 0.0,
+            "queue_wait_ms_max": 0.0,
+            "encode_ms_total": 0.0,
+            "errors": 0,
+        }
+
+    def encode(self, text, timeout=None):
+        """Encode one text; blocks until its batch has been processed."""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((text, time.perf_counter(), future))
+        return future.result(timeout=timeout)
+
+    def encode_many(self, texts, timeout=None):
+        """Encode several texts (e.g. chunks of one summary); they share batches with other callers."""
+        self._ensure_worker()
+        futures = []
+        for text in texts:
+            future = Future()
+            self._queue.put((text, time.perf_counter(), future))
+            futures.append(future)
+        return [future.result(timeout=timeout) for future in futures]
+
+    def _ensure_worker(self):
+        if self._worker is not None:
+            return
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="encoder-service", daemon=True)
+                self._worker.start()
+
+    def _collect(self):
+        """Block for the first request, then gather more until the window closes or the batch is full."""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.window_ms / 1000.0
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                vectors = self.model.encode([text for text, _, _ in batch])
+            except Exception as e:
+                for _, _, future in batch:
+                    future.set_exception(e)
+                with self._stats_lock:
+                    self._stats["errors"] += 1
+                continue
+            finished = time.perf_counter()
+            for (_, _, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+            self._record(batch, started, finished)
+
+    def _record(self, batch, started, finished):
+        waits = [(started - queued) * 1000.0 for _, queued, _ in batch]
+        with self._stats_lock:
+            s = self._stats
+            s["requests"] += len(batch)
+            s["batches"] += 1
+            s["max_batch_size"] = max(s["max_batch_size"], len(batch))
+            s["queue_wait_ms_total"] += sum(waits)
+            s["queue_wait_ms_max"] = max(s["queue_wait_ms_max"], max(waits))
+            s["encode_ms_total"] += (finished - started) * 1000.0
+
+    def stats(self):
+        """Batch size and queue-wait counters for /api/metrics."""
+        with self._stats_lock:
+            s = dict(self._stats)
+        batches, requests = s["batches"], s["requests"]
+        return {
+            "window_ms": self.window_ms,
+            "max_batch": self.max_batch,
+            "requests": requests,
+            "batches": batches,
+            "errors": s["errors"],
+            "avg_batch_size": round(requests / batches, 2) if batches else 0.0,
+            "max_batch_size": s["max_batch_size"],
+            "avg_queue_wait_ms": round(s["queue_wait_ms_total"] / requests, 3) if requests else 0.0,
+            "max_queue_wait_ms": round(s["queue_wait_ms_max"], 3),
+            "avg_encode_ms": round(s["encode_ms_total"] / batches, 3) if batches else 0.0,
+        }
@@ -0,0 +1,806 @@
+"""
+JSON File Storage Engine
+Keeps the whole learning database in a single db.json document.
+This is the default engine behind backend/database.py.
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    from .db_io import FileLock, atomic_write, append_durable
+    from . import serializers
+    from . import polyline_stats
+except ImportError:
+    from db_io import FileLock, atomic_write, append_durable
+    import serializers
+    import polyline_stats
+
+
+def empty_db():
+    """Return a freshly initialised database document."""
+    return {
+        "users": [],
+        "learning_sessions": {},
+        "polylines": {},
+        "summaries": [],
+        "bookmarks": {},  # session_id -> list of resource_ids
+        "notes": {},      # session_id -> list of note objects
+        "lectures": [],   # list of lecture objects
+        "polyline_sessions": {},  # polyline_id -> owning session_id
+        "summary_sessions": {},   # summary_id -> owning session_id
+        "meta": {"global": {}, "sessions": {}}  # derived data (e.g. running polyline stats)
+    }
+
+
+def session_id_from_summary_id(summary_id):
+    """Recover the session id from a 'summary_<session>_<YYYYmmdd>_<HHMMSS>' id."""
+    if not summary_id or not summary_id.startswith("summary_"):
+        return None
+    parts = summary_id[len("summary_"):].rsplit("_", 2)
+    if len(parts) != 3:
+        return None
+    return parts[0]
+
+
+def infer_polyline_sessions(db):
+    """
+    Map legacy polyline ids to the session that created them.
+
+    Polylines were historically stored without a session id. A polyline and
+    its summary are created in the same request and share the timestamp
+    suffix ('polyline_<ts>' / 'summary_<session>_<ts>'), which is enough to
+    recover the owner. Polylines saved with an explicit session id are
+    recorded in "polyline_sessions". Unmatched polylines fall back to 'default'.
+    """
+    recorded = db.get("polyline_sessions", {})
+    summary_sessions = db.get("summary_sessions", {})
+    ts_to_session = {}
+    for s in db.get("summaries", []):
+        session_id = summary_sessions.get(s.get("id", "")) or session_id_from_summary_id(s.get("id", ""))
+        if session_id is not None:
+            ts_to_session[s["id"][-15:]] = session_id
+
+    owners = {}
+    for polyline_id, polyline in db.get("polylines", {}).items():
+        owner = recorded.get(polyline_id)
+        if not owner and isinstance(polyline, dict):
+            owner = polyline.get("session_id")
+        if not owner and polyline_id.startswith("polyline_"):
+            owner = ts_to_session.get(polyline_id[-15:])
+        owners[polyline_id] = owner or "default"
+    return owners
+
+
+def summary_session_id(summary, recorded=None):
+    """Owner of a summary: the session it was saved under, else the one in its id, else 'default'."""
+    summary_id = summary.get("id", "")
+    return (recorded or {}).get(summary_id) or session_id_from_summary_id(summary_id) or "default"
+
+
+def polyline_timestamp(polyline_id, polyline, default=0):
+    """Creation time (ms) of a polyline; older ones without a 'timestamp' fall back to the time in their id."""
+    ts = polyline.get("timestamp") if isinstance(polyline, dict) else None
+    if ts:
+        return ts
+    try:
+        return int(datetime.strptime(polyline_id[len("polyline_"):len("polyline_") + 15], "%Y%m%d_%H%M%S")
+                   .timestamp() * 1000)
+    except ValueError:
+        return default
+
+
+def meta_scope(db, session_id=None, create=True):
+    """The derived-data dict of one scope (None: cross-session) of a database document."""
+    meta = db.setdefault("meta", {"global": {}, "sessions": {}}) if create else db.get("meta", {})
+    if session_id is None:
+        return meta.setdefault("global", {}) if create else meta.get("global", {})
+    return meta.setdefault("sessions", {}).setdefault(session_id, {}) if create else meta.get("sessions", {}).get(session_id, {})
+
+
+# Versions and change log of a scope, kept in its meta dict (shards use the
+# same layout): 'data_version' is stamped by every logged write,
+# 'polylines_version' by those touching polylines, and 'change_log' holds
+# {"floor", "entries": [[seq, kind, id], ...]}, where floor is the newest
+# seq the entries no longer cover.
+
+def stamp_change(scope, seq, entries, polylines=False):
+    """Stamp `seq` on a scope and append its (kind, id) entries to the scope's change log."""
+    log = scope.get("change_log")
+    if log is None:
+        log = scope["change_log"] = {"floor": scope.get("data_version") or 0, "entries": []}
+    log["entries"].extend([seq, kind, key] for kind, key in entries)
+    scope["data_version"] = seq
+    if polylines:
+        scope["polylines_version"] = seq
+
+
+def trim_change_log(scope, size):
+    """Keep the newest `size` entries of a scope's change log (whole seqs are dropped)."""
+    log = scope.get("change_log")
+    if log and len(log["entries"]) > size:
+        cut = log["entries"][-size - 1][0]
+        log["floor"] = max(log["floor"], cut)
+        log["entries"] = [e for e in log["entries"] if e[0] > cut]
+
+
+def scope_changes(scopes, since):
+    """
+    ([seq, kind, id] entries after `since`, oldest first, complete) over
+    several scopes; complete is False when a log no longer reaches back to `since`.
+    """
+    entries = []
+    for scope in scopes:
+        if (scope.get("data_version") or 0) <= since:
+            continue
+        log = scope.get("change_log")
+        if log is None or since < log["floor"]:
+            return [], False
+        entries.extend(e for e in log["entries"] if e[0] > since)
+    entries.sort(key=lambda e: e[0])
+    return entries, True
+
+
+def apply_op(db, op):
+    """Apply a single mutation record to an in-memory database document."""
+    kind = op["op"]
+    if kind == "put_session":
+        db["learning_sessions"][op["session_id"]] = op["data"]
+    elif kind == "put_polyline":
+        db["polylines"][op["polyline_id"]] = op["data"]
+        if op.get("session_id"):
+            db.setdefault("polyline_sessions", {})[op["polyline_id"]] = op["session_id"]
+    elif kind == "delete_polylines":
+        for k in op["polyline_ids"]:
+            db["polylines"].pop(k, None)
+            db.get("polyline_sessions", {}).pop(k, None)
+    elif kind == "add_summary":
+        db.setdefault("summaries", []).append(op["data"])
+        if op.get("session_id"):
+            db.setdefault("summary_sessions", {})[op["data"].get("id", "")] = op["session_id"]
+    elif kind == "delete_summaries":
+        ids = set(op["summary_ids"])
+        db["summaries"] = [s for s in db.get("summaries", []) if s.get("id", "") not in ids]
+        for k in ids:
+            db.get("summary_sessions", {}).pop(k, None)
+    elif kind == "update_summaries":
+        records = op["records"]
+        db["summaries"] = [records.get(s.get("id", ""), s) for s in db.get("summaries", [])]
+    elif kind == "set_bookmarks":
+        db["bookmarks"][op["session_id"]] = op["resource_ids"]
+    elif kind == "add_note":
+        db["notes"].setdefault(op["session_id"], []).append(op["data"])
+    elif kind == "delete_session":
+        for collection in ("learning_sessions", "bookmarks", "notes"):
+            db.get(collection, {}).pop(op["session_id"], None)
+        db.get("meta", {}).get("sessions", {}).pop(op["session_id"], None)
+    elif kind == "put_meta":
+        meta_scope(db, op["session_id"])[op["key"]] = op["value"]
+    elif kind == "log_change":
+        stamp_change(meta_scope(db, op["session_id"]), op["seq"], op["entries"], op["polylines"])
+    elif kind == "add_polyline_stats":
+        stats = meta_scope(db, op["session_id"]).get(polyline_stats.META_KEY)
+        # Unset (or outdated) stats are rebuilt from the polylines on the next read
+        if polyline_stats.is_current(stats):
+            polyline_stats.add_polyline(stats, op["scores"], op["keywords"])
+    elif kind == "replace":
+        db.clear()
+        db.update(op["data"])
+    else:
+        raise ValueError(f"Unknown database operation: {kind}")
+
+
+class SessionIndex:
+    """
+    Secondary indexes of a database document: session_id -> polyline ids and
+    session_id -> summaries (the same objects as in the document, in order).
+    Kept next to the cached document and updated with every applied op, so
+    per-session reads do not scan other learners' data.
+    """
+
+    def __init__(self, db):
+        self.owners = infer_polyline_sessions(db)
+        self.polylines = {}
+        for polyline_id, session_id in self.owners.items():
+            self.polylines.setdefault(session_id, {})[polyline_id] = None
+        self._index_summaries(db)
+
+    def _index_summaries(self, db):
+        self.summaries = {}
+        recorded = db.get("summary_sessions", {})
+        for summary in db.get("summaries", []):
+            self.summaries.setdefault(summary_session_id(summary, recorded), []).append(summary)
+
+    def apply(self, db, op):
+        """Update the indexes for an op that was just applied to `db`."""
+        kind = op["op"]
+        if kind == "put_polyline":
+            polyline_id = op["polyline_id"]
+            old = self.owners.get(polyline_id)
+            # Updates of an existing polyline (e.g. visibility toggles) keep their owner
+            session_id = op.get("session_id") or old or "default"
+            if old != session_id:
+                if old is not None:
+                    self.polylines[old].pop(polyline_id, None)
+                self.owners[polyline_id] = session_id
+                self.polylines.setdefault(session_id, {})[polyline_id] = None
+        elif kind == "delete_polylines":
+            for polyline_id in op["polyline_ids"]:
+                session_id = self.owners.pop(polyline_id, None)
+                if session_id is not None:
+                    self.polylines[session_id].pop(polyline_id, None)
+        elif kind == "add_summary":
+            session_id = op.get("session_id") or summary_session_id(op["data"])
+            self.summaries.setdefault(session_id, []).append(op["data"])
+        elif kind in ("delete_summaries", "update_summaries"):
+            self._index_summaries(db)
+        elif kind == "replace":
+            self.__init__(db)
+
+
+class JSONStore:
+    """
+    Single-document storage engine backed by a JSON file.
+
+    Mutations are appended as small records to an append-only journal
+    (`<db file>.journal`, one JSON object per line) instead of rewriting the
+    whole document. The snapshot is rebuilt by a background compactor, and
+    on load the journal is replayed on top of it. Every record carries a
+    sequence number and the snapshot remembers the last one it contains, so
+    replay after a crash (even mid-compaction) is deterministic. A torn tail
+    from an append that died midway is cut (under the file lock) before the
+    next append, scan or compaction, and unreadable lines are skipped on
+    replay. The snapshot is written in
+    `fmt` (see serializers.py) and read back in whatever format it has.
+
+    Reads are served from an in-memory parsed copy of the document. The copy
+    is updated in place when this process writes; it is re-parsed only when
+    the snapshot's inode/mtime/size changes (another worker compacted or
+    rewrote it), and records appended to the journal by other workers are
+    replayed from the last known offset. Collection reads (get_polylines,
+    get_summaries, load_all) share their records with the cache: copy a
+    record before mutating it unless it is saved straight back.
+    """
+
+    name = "json"
+
+    def __init__(self, path, journal=True, compact_interval=10.0, compact_min_records=1, fsync=True, cache=True,
+                 group_commit_ms=5.0, fmt='json', change_log_size=500):
+        self.path = path
+        self.format = serializers.resolve_format(fmt)
+        self.journal_path = path + '.journal'
+        self.journal_enabled = journal
+        self.compact_interval = compact_interval
+        self.compact_min_records = compact_min_records
+        self.fsync = fsync
+        self.cache_enabled = cache
+        self.group_commit_ms = group_commit_ms
+        self.change_log_size = change_log_size
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+        self._flock = FileLock(path)
+        self._local = threading.local()
+        self._compactor = None
+
+        # Group commit state: the open batch and the number of in-flight writers
+        self._batch = None
+        self._writers = 0
+        self._writers_guard = threading.Lock()
+
+        # In-memory copy of the document and the on-disk state it reflects
+        self._cache = None
+        self._index = None
+        self._cache_seq = 0
+        self._snapshot_seq = 0
+        self._snapshot_key = None
+        self._journal_ino = None
+        self._journal_offset = 0
+        self.stats = {"hits": 0, "misses": 0, "journal_replays": 0}
+
+    # ---------- file level ----------
+
+    @contextmanager
+    def _exclusive(self):
+        """Hold both the in-process lock and the file lock once no group commit is pending."""
+        with self._lock:
+            while self._batch is not None:
+                self._cond.wait()
+            with self._flock:
+                yield
+
+    def init(self):
+        with self._exclusive():
+            if not os.path.exists(self.path):
+                self._write_snapshot(empty_db(), 0)
+            if self.journal_enabled:
+                self._repair_journal()
+            # Replay on startup so the sequence counter is known before the first write
+            self._refresh()
+
+    def reset(self):
+        with self._exclusive():
+            for p in (self.path, self.journal_path):
+                if os.path.exists(p):
+                    os.remove(p)
+            self._cache = None
+            self.init()
+
+    @staticmethod
+    def _stat_key(st):
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _read_snapshot(self):
+        """Parse the snapshot file and return (document, last journal seq it contains, stat key)."""
+        try:
+            with open(self.path, 'rb') as f:
+                key = self._stat_key(os.fstat(f.fileno()))
+                content = f.read()
+            # The snapshot may be in any supported format, e.g. after DB_FORMAT changed
+            db = serializers.loads(content) if content.strip() else None
+        except (ValueError, FileNotFoundError):
+            db = None
+        if db is None:
+            db = empty_db()
+            self._write_snapshot(db, 0)
+            key = self._stat_key(os.stat(self.path))
+        seq = db.pop("_journal_seq", 0)
+
+        # Older files may predate bookmarks / per-session notes
+        if "bookmarks" not in db:
+            db["bookmarks"] = {}
+        if "notes" not in db or isinstance(db["notes"], list):
+            db["notes"] = {}
+        db.setdefault("polylines", {})
+        db.setdefault("learning_sessions", {})
+        return db, seq, key
+
+    def _scan_journal(self, offset=0):
+        """
+        Return (records, end offset, inode) for the complete journal lines
+        after `offset`. A line that does not parse (torn bytes a later append
+        ran into) is skipped; an unterminated last line is left for later,
+        it may be an append still in progress.
+        """
+        if not self.journal_enabled:
+            return [], 0, None
+        try:
+            f = open(self.journal_path, 'rb')
+        except FileNotFoundError:
+            return [], 0, None
+        with f:
+            ino = os.fstat(f.fileno()).st_ino
+            f.seek(offset)
+            records = []
+            end = offset
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break  # unterminated (interrupted or in-flight append)
+                end += len(line)
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    print(f"[DB] Skipping unreadable journal line at byte {end - len(line)}")
+        return records, end, ino
+
+    def _repair_journal(self):
+        """
+        Cut a torn tail left by an append that died midway, so the next record
+        starts on a clean line. Caller holds the file lock: no append can be in
+        flight, so an unterminated last line is always garbage.
+        """
+        try:
+            f = open(self.journal_path, 'rb+')
+        except FileNotFoundError:
+            return
+        with f:
+            size = f.seek(0, os.SEEK_END)
+            if size == 0:
+                return
+            f.seek(size - 1)
+            if f.read(1) == b'\n':
+                return
+            # Walk back to the end of the last complete line
+            end, pos = 0, size
+            while pos > 0:
+                step = min(65536, pos)
+                pos -= step
+                f.seek(pos)
+                newline = f.read(step).rfind(b'\n')
+                if newline != -1:
+                    end = pos + newline + 1
+                    break
+            print(f"[DB] Truncating torn journal tail at byte {end}")
+            f.truncate(end)
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def _refresh(self):
+        """Bring the in-memory document up to date with the files. Caller holds self._lock."""
+        try:
+            snapshot_key = self._stat_key(os.stat(self.path))
+        except FileNotFoundError:
+            snapshot_key = None
+        if not self.cache_enabled or self._cache is None or snapshot_key != self._snapshot_key:
+            db, seq, key = self._read_snapshot()
+            self._snapshot_seq = seq
+            records, end, ino = self._scan_journal()
+            for record in records:
+                if record["seq"] > seq:
+                    apply_op(db, record)
+                    seq = record["seq"]
+            self._cache, self._cache_seq, self._snapshot_key = db, seq, key
+            self._index = SessionIndex(db)
+            self._journal_ino, self._journal_offset = ino, end
+            self.stats["misses"] += 1
+            return self._cache
+
+        if self.journal_enabled:
+            try:
+                st = os.stat(self.journal_path)
+                ino, size = st.st_ino, st.st_size
+            except FileNotFoundError:
+                ino, size = None, 0
+            if ino != self._journal_ino or size != self._journal_offset:
+                # Another worker appended (or the journal was recreated): replay the new tail only
+                offset = self._journal_offset if ino == self._journal_ino else 0
+                records, end, ino = self._scan_journal(offset)
+                for record in records:
+                    if record["seq"] > self._cache_seq:
+                        self._apply(record)
+                        self._cache_seq = record["seq"]
+                self._journal_ino, self._journal_offset = ino, end
+                self.stats["journal_replays"] += 1
+        self.stats["hits"] += 1
+        return self._cache
+
+    def _apply(self, op):
+        """Apply a mutation to the cached document and its session index."""
+        apply_op(self._cache, op)
+        self._index.apply(self._cache, op)
+
+    def _write_snapshot(self, db, seq):
+        data = dict(db)
+        if self.journal_enabled:
+            data["_journal_seq"] = seq
+        atomic_write(self.path, serializers.dumps(data, self.format), fsync=self.fsync)
+
+    def load_all(self):
+        with self._reading() as db:
+            return dict(db)
+
+    def save_all(self, db):
+        self._mutate({"op": "replace", "data": db})
+
+    def cache_stats(self):
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return dict(self.stats, hit_ratio=round(self.stats["hits"] / lookups, 4) if lookups else 0.0)
+
+    # ---------- journal compaction ----------
+
+    def compact(self):
+        """Fold the journal into a fresh snapshot. Returns the number of records folded."""
+        if not self.journal_enabled:
+            return 0
+        with self._lock:
+            if self._batch is not None:
+                return 0  # a group commit is in flight; the compactor retries later
+            with self._flock:
+                self._repair_journal()
+                db = self._refresh()
+                folded = self._cache_seq - self._snapshot_seq
+                if folded > 0:
+                    self._trim_change_logs(db)
+                    self._write_snapshot(db, self._cache_seq)
+                    self._snapshot_seq = self._cache_seq
+                    self._snapshot_key = self._stat_key(os.stat(self.path))
+                if os.path.exists(self.journal_path):
+                    # Every journal record is now covered by the snapshot's _journal_seq
+                    os.remove(self.journal_path)
+                    self._journal_ino, self._journal_offset = None, 0
+                return max(folded, 0)
+
+    def _trim_change_logs(self, db):
+        """Cut every scope's change log to change_log_size before it is written to a snapshot."""
+        meta = db.get("meta", {})
+        for scope in [meta.get("global", {})] + list(meta.get("sessions", {}).values()):
+            trim_change_log(scope, self.change_log_size)
+
+    def _journal_records(self):
+        if not os.path.exists(self.journal_path):
+            return 0
+        with open(self.journal_path, 'rb') as f:
+            return sum(1 for _ in f)
+
+    def _start_compactor(self):
+        if self._compactor is not None or not self.compact_interval:
+            return
+
+        def run():
+            while True:
+                time.sleep(self.compact_interval)
+                try:
+                    if self._journal_records() >= self.compact_min_records:
+                        self.compact()
+                except Exception as e:
+                    print(f"[DB] Journal compaction failed: {e}")
+
+        self._compactor = threading.Thread(target=run, name="db-journal-compactor", daemon=True)
+        self._compactor.start()
+
+    # ---------- transactions ----------
+
+    @contextmanager
+    def _reading(self):
+        with self._lock:
+            if getattr(self._local, "ops", None) is not None:
+                yield self._cache  # already refreshed when the transaction began
+            else:
+                yield self._refresh()
+
+    @contextmanager
+    def transaction(self):
+        """
+        Run a read-modify-write cycle under the cross-process file lock.
+
+        Transactions that overlap in time are group-committed: the first one
+        (the leader) keeps the file lock open for up to `group_commit_ms` while
+        other threads of this process add their mutations to the same batch,
+        then writes the whole batch with one journal append and one fsync.
+        A writer that finds no concurrent writers commits immediately.
+        """
+        if getattr(self._local, "ops", None) is not None:
+            yield
+            return
+        with self._writers_guard:
+            self._writers += 1
+        try:
+            with self._lock:
+                batch = self._batch
+                leader = batch is None
+                if leader:
+                    self._flock.acquire()
+                    batch = self._batch = {"ops": [], "done": False, "error": None}
+                    try:
+                        if self.journal_enabled:
+                            self._repair_journal()
+                        self._refresh()
+                    except BaseException:
+                        self._close_batch(batch)
+                        raise
+                self._local.ops = []
+                try:
+                    yield
+                    batch["ops"].extend(self._local.ops)
+                except BaseException:
+                    # Our ops were already applied to the cache: drop it and re-read from disk
+                    self._cache = None
+                    if leader:
+                        self._close_batch(batch)
+                    raise
+                finally:
+                    self._local.ops = None
+
+            if leader:
+                if self.group_commit_ms and batch["ops"] and self._writers > 1:
+                    time.sleep(self.group_commit_ms / 1000.0)
+                with self._lock:
+                    self._close_batch(batch)
+            else:
+                with self._cond:
+                    while not batch["done"]:
+                        self._cond.wait()
+        finally:
+            with self._writers_guard:
+                self._writers -= 1
+        if batch["error"] is not None:
+            raise batch["error"]
+
+    def _close_batch(self, batch):
+        """Write a batch, release the file lock and wake up its waiters. Caller holds self._lock."""
+        try:
+            if batch["ops"]:
+                self._commit(batch["ops"])
+        except BaseException as e:
+            self._cache = None
+            batch["error"] = e
+        finally:
+            self._batch = None
+            self._flock.release()
+            batch["done"] = True
+            self._cond.notify_all()
+
+    def _commit(self, ops):
+        stale = self._cache is None
+        if stale:
+            # A failed transaction invalidated the cache; the batch is applied on the next read
+            self._refresh()
+        if not self.journal_enabled:
+            if stale:
+                for op in ops:
+                    self._apply(copy.deepcopy(op))
+            self._trim_change_logs(self._cache)
+            self._write_snapshot(self._cache, 0)
+            self._snapshot_key = self._stat_key(os.stat(self.path))
+            return
+        lines = []
+        seq = self._cache_seq
+        for op in ops:
+            seq += 1
+            lines.append(json.dumps(dict(op, seq=seq)) + '\n')
+        payload = ''.join(lines)
+        append_durable(self.journal_path, payload, fsync=self.fsync)
+        self._cache_seq = seq
+
+        st = os.stat(self.journal_path)
+        expected = (self._journal_offset if st.st_ino == self._journal_ino else 0) + len(payload.encode('utf-8'))
+        if st.st_size == expected and not stale:
+            self._journal_ino, self._journal_offset = st.st_ino, st.st_size
+        else:
+            # Re-read everything (including this batch) on the next access
+            self._cache = None
+        self._start_compactor()
+
+    def _mutate(self, op):
+        with self.transaction():
+            self._local.ops.append(op)
+            self._apply(copy.deepcopy(op))
+
+    # ---------- sessions ----------
+
+    def get_session(self, session_id):
+        with self._reading() as db:
+            return copy.deepcopy(db["learning_sessions"].get(session_id))
+
+    def put_session(self, session_id, data):
+        self._mutate({"op": "put_session", "session_id": session_id, "data": data})
+
+    # ---------- polylines ----------
+
+    def get_polylines(self, session_id=None):
+        with self._reading() as db:
+            if session_id is None:
+                return dict(db["polylines"])
+            return {k: db["polylines"][k] for k in self._index.polylines.get(session_id, ())}
+
+    def find_polyline(self, polyline_id, session_id=None):
+        """Return (owning session id, record) of a stored polyline, or (None, None)."""
+        with self._reading() as db:
+            polyline = db["polylines"].get(polyline_id)
+            if polyline is None:
+                return None, None
+            return self._index.owners.get(polyline_id), copy.deepcopy(polyline)
+
+    def put_polyline(self, polyline_id, data, session_id=None):
+        op = {"op": "put_polyline", "polyline_id": polyline_id, "data": data}
+        if session_id is not None:
+            op["session_id"] = session_id
+        self._mutate(op)
+
+    def delete_session_polylines(self, session_id):
+        """Remove the session's polylines (and a stored average); returns the removed {id: record}."""
+        # We remove the average polyline and any session-specific polylines
+        with self._reading() as db:
+            keys = list(self._index.polylines.get(session_id, ()))
+            if 'current_average' in db["polylines"] and 'current_average' not in keys:
+                keys.append('current_average')
+            removed = {k: db["polylines"][k] for k in keys}
+        if keys:
+            self._mutate({"op": "delete_polylines", "polyline_ids": keys})
+        return removed
+
+    # ---------- summaries ----------
+
+    def get_summaries(self, session_id=None, since=None):
+        with self._reading() as db:
+            summaries = db.get("summaries", []) if session_id is None else self._index.summaries.get(session_id, ())
+            if since is not None:
+                return [s for s in summaries if (s.get("timestamp") or 0) > since]
+            return list(summaries)
+
+    def add_summary(self, data, session_id=None):
+        op = {"op": "add_summary", "data": data}
+        if session_id is not None:
+            op["session_id"] = session_id
+        self._mutate(op)
+
+    def update_summaries(self, records):
+        """Replace stored summaries by id ({summary_id: data}); owners and order are kept."""
+        if records:
+            self._mutate({"op": "update_summaries", "records": records})
+
+    def delete_session_summaries(self, session_id):
+        with self._reading():
+            ids = [s.get("id", "") for s in self._index.summaries.get(session_id, ())]
+        if ids:
+            self._mutate({"op": "delete_summaries", "summary_ids": ids})
+
+    # ---------- bookmarks / notes / lectures ----------
+
+    def get_bookmarks(self, session_id):
+        with self._reading() as db:
+            bookmarks = db["bookmarks"].get(session_id)
+            return list(bookmarks) if bookmarks is not None else None
+
+    def set_bookmarks(self, session_id, resource_ids):
+        self._mutate({"op": "set_bookmarks", "session_id": session_id, "resource_ids": list(resource_ids)})
+
+    def get_notes(self, session_id):
+        with self._reading() as db:
+            return copy.deepcopy(db["notes"].get(session_id, []))
+
+    def add_note(self, session_id, note_data):
+        self._mutate({"op": "add_note", "session_id": session_id, "data": note_data})
+
+    def get_lectures(self):
+        with self._reading() as db:
+            return copy.deepcopy(db.get("lectures", []))
+
+    # ---------- derived data ----------
+
+    def get_meta(self, key, session_id=None):
+        with self._reading() as db:
+            return copy.deepcopy(meta_scope(db, session_id, create=False).get(key))
+
+    def put_meta(self, key, value, session_id=None):
+        self._mutate({"op": "put_meta", "session_id": session_id, "key": key, "value": value})
+
+    def add_polyline_stats(self, scores, keywords, session_id=None):
+        """Fold one polyline into the scope's running stats (journaled as the delta only)."""
+        self._mutate({"op": "add_polyline_stats", "session_id": session_id,
+                      "scores": scores, "keywords": list(keywords)})
+
+    # ---------- versions / change log ----------
+
+    def get_version(self, session_id=None):
+        """Version of the last logged write to a scope (0 before the first)."""
+        with self._reading() as db:
+            return meta_scope(db, session_id, create=False).get("data_version") or 0
+
+    def polyline_versions(self):
+        """{scope: version of its last polyline write} of every scope with one."""
+        with self._reading() as db:
+            meta = db.get("meta", {})
+            scopes = [(None, meta.get("global", {}))] + list(meta.get("sessions", {}).items())
+            return {sid: scope["polylines_version"] for sid, scope in scopes if scope.get("polylines_version")}
+
+    def log_change(self, seq, entries, polylines=False, session_id=None):
+        """Stamp `seq` on a scope and log its (kind, id) entries, as one journal record."""
+        self._mutate({"op": "log_change", "session_id": session_id, "seq": seq,
+                      "entries": [list(e) for e in entries], "polylines": polylines})
+
+    def changes_since(self, since, session_ids=None):
+        """([seq, kind, id] entries after `since`, complete) of the given scopes (None: every scope)."""
+        with self._reading() as db:
+            if session_ids is None:
+                meta = db.get("meta", {})
+                scopes = [meta.get("global", {})] + list(meta.get("sessions", {}).values())
+            else:
+                scopes = [meta_scope(db, sid, create=False) for sid in session_ids]
+            entries, complete = scope_changes(scopes, since)
+            return [list(e) for e in entries], complete
+
+    # ---------- retention ----------
+
+    def session_ids(self):
+        with self._reading() as db:
+            return list(db["learning_sessions"])
+
+    def delete_session(self, session_id):
+        """Remove everything stored for one session."""
+        with self.transaction():
+            with self._reading() as db:
+                polyline_ids = list(self._index.polylines.get(session_id, ()))
+                summary_ids = [s.get("id", "") for s in self._index.summaries.get(session_id, ())]
+            if polyline_ids:
+                self._mutate({"op": "delete_polylines", "polyline_ids": polyline_ids})
+            if summary_ids:
+                self._mutate({"op": "delete_summaries", "summary_ids": summary_ids})
+            self._mutate({"op": "delete_session", "session_id": session_id})
+
+    def disk_usage(self):
+        return sum(os.path.getsize(p) for p in (self.path, self.journal_path) if os.path.exists(p))
@@ -0,0 +1,82 @@
+"""
+Keyword Matcher
+Finds module names, module aliases and resource titles in a summary with
+one pass over the text (Aho-Corasick), instead of one substring scan per
+pattern. Matching is case-insensitive and, like `pattern in text`, finds
+patterns anywhere, including inside longer words and overlapping matches.
+"""
+
+from collections import deque
+
+
+class AhoCorasick:
+    """Multi-pattern substring search over a fixed set of patterns."""
+
+    def __init__(self, patterns):
+        self.patterns = list(dict.fromkeys(patterns))
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for index, pattern in enumerate(self.patterns):
+            node = 0
+            for ch in pattern:
+                nxt = self._goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[node][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = nxt
+            self._out[node].append(index)
+        self._build_failure_links()
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(ch, 0)
+                # Patterns ending at the failure state also end here
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find_all(self, text):
+        """Set of patterns occurring in `text` (an empty pattern always occurs)."""
+        found = set(self._out[0])
+        node = 0
+        for ch in text:
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            if self._out[node]:
+                found.update(self._out[node])
+        return {self.patterns[i] for i in found}
+
+
+class KeywordMatcher:
+    """Module/alias/title keywords of a summary, in the order create_learning_summary reports them."""
+
+    def __init__(self, ordered_modules, module_aliases, resources):
+        self.module_patterns = [
+            (module, [module.lower()] + [alias.lower() for alias in module_aliases.get(module, [])])
+            for module in ordered_modules
+        ]
+        titles = [r['title'].lower() for r in resources]
+        self._automaton = AhoCorasick([p for _, patterns in self.module_patterns for p in patterns] + titles)
+
+    def match(self, summary, visited_resources):
+        """
+        Modules whose name or an alias occurs in the summary (module order),
+        then titles of visited resources that occur and are not already listed.
+        """
+        found = self._automaton.find_all(summary.lower())
+        keywords_found = [module for module, patterns in self.module_patterns
+                          if any(p in found for p in patterns)]
+        for r in visited_resources:
+            if r['title'].lower() in found and r['title'] not in keywords_found:
+                keywords_found.append(r['title'])
+        return keywords_found
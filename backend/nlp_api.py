@@ -5,9 +5,13 @@ Provides endpoints for the frontend grid-based NLP learning system.
 
 import os
 import json
+import base64
+import hashlib
 import pandas as pd
-from flask import jsonify, request
+from flask import Response, jsonify, request
 import numpy as np
+from collections import Counter
+from functools import lru_cache
 from datetime import datetime
 import nltk
 
@@ -24,20 +28,38 @@ except Exception as e:
 # Import backend modules (support both script and package execution)
 try:
     from .init import app
-    from .database import get_session, update_session, save_summary, save_polyline, get_polylines as get_db_polylines, get_notes, add_note, get_lectures, reset_db, get_bookmarks, add_bookmark, remove_bookmark, reset_session_data
+    from .database import get_session, update_session, save_summary, save_polyline, get_polylines as get_db_polylines, get_summaries as get_db_summaries, get_notes, add_note, get_lectures, reset_db, get_bookmarks, add_bookmark, remove_bookmark, reset_session_data, get_cache_stats, get_polyline_stats, hydrate_text, data_version, data_epoch, sync_watermark, changes_since, find_polylines, get_bookmarks as get_db_bookmarks
     from .request_logger import log_request
-    from .utils import utils_preprocess_text, get_cos_sim
+    from .utils import utils_preprocess_text, l2_normalize_rows, get_cos_sim_matrix, split_sentence_chunks
     from . import navigator
     from . import persona_service
     from . import radial_mapper
+    from . import polyline_stats
+    from . import embedding_cache
+    from . import onnx_encoder
+    from .encoder_service import EncoderService
+    from .summary_cache import SummaryEmbeddingCache, cache_key as summary_cache_key
+    from .summary_jobs import JobManager, QueueFull, FINISHED
+    from .catalog import ResourceCatalog
+    from .keyword_matcher import KeywordMatcher
+    from .json_store import polyline_timestamp
 except ImportError:
     from init import app
-    from database import get_session, update_session, save_summary, save_polyline, get_polylines as get_db_polylines, get_notes, add_note, get_lectures, reset_db, get_bookmarks, add_bookmark, remove_bookmark, reset_session_data
+    from database import get_session, update_session, save_summary, save_polyline, get_polylines as get_db_polylines, get_summaries as get_db_summaries, get_notes, add_note, get_lectures, reset_db, get_bookmarks, add_bookmark, remove_bookmark, reset_session_data, get_cache_stats, get_polyline_stats, hydrate_text, data_version, data_epoch, sync_watermark, changes_since, find_polylines, get_bookmarks as get_db_bookmarks
     from request_logger import log_request
-    from utils import utils_preprocess_text, get_cos_sim
+    from utils import utils_preprocess_text, l2_normalize_rows, get_cos_sim_matrix, split_sentence_chunks
     import navigator
     import persona_service
     import radial_mapper
+    import polyline_stats
+    import embedding_cache
+    import onnx_encoder
+    from encoder_service import EncoderService
+    from summary_cache import SummaryEmbeddingCache, cache_key as summary_cache_key
+    from summary_jobs import JobManager, QueueFull, FINISHED
+    from catalog import ResourceCatalog
+    from keyword_matcher import KeywordMatcher
+    from json_store import polyline_timestamp
 
 # Define stopwords
 stop_words = set(stopwords.words('english'))
@@ -51,18 +73,105 @@ def log_polyline_step(step, details):
     with open(POLYLINE_LOG_FILE, 'a', encoding='utf-8') as f:
         f.write(f"[{timestamp}] [{step}]\n{details}\n{'-'*50}\n")
 
-try:
-    from sentence_transformers import SentenceTransformer
-    print("Loading BERT model (on startup)...")
-    _bert_model = SentenceTransformer('all-MiniLM-L6-v2')
-    print("BERT model loaded successfully")
-except Exception as e:
-    print(f"Error loading BERT model: {e}")
-    _bert_model = None
+BERT_MODEL_NAME = 'all-MiniLM-L6-v2'
+# Module embeddings persist here across restarts and workers (keyed by model + texts)
+EMBEDDING_CACHE_DIR = os.getenv('EMBEDDING_CACHE_DIR', os.path.join(os.path.dirname(__file__), 'data', 'cache'))
+
+# Inference backend: 'torch' (SentenceTransformer), 'onnx' or 'onnx-int8'
+# (onnxruntime on CPU, exported to ONNX_MODEL_DIR on first use; see onnx_encoder.py,
+# needs requirements-onnx.txt)
+BERT_BACKEND = os.getenv('BERT_BACKEND', 'torch')
+ONNX_MODEL_DIR = os.getenv('ONNX_MODEL_DIR', os.path.join(EMBEDDING_CACHE_DIR, 'onnx'))
+
+def _load_bert_model():
+    """(model, backend actually in use); ONNX failures fall back to torch."""
+    if BERT_BACKEND in ('onnx', 'onnx-int8'):
+        try:
+            print(f"Loading BERT model via onnxruntime ({BERT_BACKEND})...")
+            model = onnx_encoder.load(BERT_MODEL_NAME, ONNX_MODEL_DIR, quantized=BERT_BACKEND == 'onnx-int8')
+            print("BERT model loaded successfully")
+            return model, BERT_BACKEND
+        except Exception as e:
+            print(f"Error loading ONNX model, falling back to torch: {e}")
+    try:
+        from sentence_transformers import SentenceTransformer
+        print("Loading BERT model (on startup)...")
+        model = SentenceTransformer(BERT_MODEL_NAME)
+        print("BERT model loaded successfully")
+        return model, 'torch'
+    except Exception as e:
+        print(f"Error loading BERT model: {e}")
+        return None, None
+
+_bert_model, _bert_backend = _load_bert_model()
 
 def get_bert_model():
     return _bert_model
 
+def bert_model_key():
+    """Model identity for cached embeddings; ONNX/int8 vectors differ slightly from torch"""
+    if _bert_backend in (None, 'torch'):
+        return BERT_MODEL_NAME
+    return f"{BERT_MODEL_NAME}+{_bert_backend}"
+
+# Concurrent summary encodes are batched: wait up to ENCODER_BATCH_WINDOW_MS
+# for more texts, at most ENCODER_MAX_BATCH per model call
+ENCODER_BATCH_WINDOW_MS = float(os.getenv('ENCODER_BATCH_WINDOW_MS', '5'))
+ENCODER_MAX_BATCH = int(os.getenv('ENCODER_MAX_BATCH', '32'))
+_encoder = None
+
+def get_encoder():
+    """Shared micro-batching encoder around the BERT model (None when the model is unavailable)."""
+    global _encoder
+    bert_model = get_bert_model()
+    if bert_model is None:
+        return None
+    if _encoder is None or _encoder.model is not bert_model:
+        _encoder = EncoderService(bert_model, window_ms=ENCODER_BATCH_WINDOW_MS, max_batch=ENCODER_MAX_BATCH)
+    return _encoder
+
+# Long summaries are split into sentence-aligned chunks of SUMMARY_CHUNK_WORDS
+# words (within the model's 256-token window), encoded as one batch and
+# mean-pooled; at most SUMMARY_MAX_CHUNKS are encoded to bound latency
+SUMMARY_CHUNK_WORDS = int(os.getenv('SUMMARY_CHUNK_WORDS', '200'))
+SUMMARY_MAX_CHUNKS = int(os.getenv('SUMMARY_MAX_CHUNKS', '8'))
+
+# Embeddings of cleaned summary chunks, keyed by model + text: an in-process
+# LRU plus (SUMMARY_CACHE_DISK=1) a SQLite file shared by all workers
+summary_cache = SummaryEmbeddingCache(
+    memory_items=int(os.getenv('SUMMARY_CACHE_ITEMS', '1024')),
+    disk_path=os.path.join(EMBEDDING_CACHE_DIR, 'summary_embeddings.sqlite3')
+    if os.getenv('SUMMARY_CACHE_DISK', '0') == '1' else None,
+    disk_max_mb=float(os.getenv('SUMMARY_CACHE_DISK_MB', '64')),
+)
+
+@lru_cache(maxsize=1024)
+def _clean_summary_chunks(summary):
+    """Preprocessed chunks of a raw summary (memoized: retries skip the preprocessing too)"""
+    chunks = split_sentence_chunks(summary, SUMMARY_CHUNK_WORDS, SUMMARY_MAX_CHUNKS)
+    clean_chunks = (utils_preprocess_text(c, flg_stemm=False, flg_lemm=True, lst_stopwords=stop_words) for c in chunks)
+    return tuple(c for c in clean_chunks if c) or ('',)
+
+def encode_summary(summary):
+    """Embedding of a raw summary; only chunks missing from summary_cache are encoded."""
+    clean_chunks = _clean_summary_chunks(summary)
+    model_key = bert_model_key()
+    keys = [summary_cache_key(model_key, c) for c in clean_chunks]
+    vectors = [summary_cache.get(k) for k in keys]
+    missing = [i for i, v in enumerate(vectors) if v is None]
+    if missing:
+        encoder = get_encoder()
+        if len(missing) == 1:
+            fresh = [encoder.encode(clean_chunks[missing[0]])]
+        else:
+            fresh = encoder.encode_many([clean_chunks[i] for i in missing])
+        for i, vector in zip(missing, fresh):
+            vectors[i] = vector
+            summary_cache.put(keys[i], vector)
+    if len(vectors) == 1:
+        return vectors[0]
+    return np.mean(l2_normalize_rows(np.vstack(vectors)), axis=0)
+
 # Load NLP data from JSON (Excel was rejected by HF)
 nlp_json_path = os.path.join(os.path.dirname(__file__), 'nlp', 'nlp_resources.json')
 
@@ -196,6 +305,33 @@ def load_nlp_resources():
 
 # Cache resources
 nlp_resources = load_nlp_resources()
+# O(1) lookups by id / module / title and the module order, shared by all endpoints
+catalog = ResourceCatalog(nlp_resources)
+
+# Module Aliases for better keyword matching
+MODULE_ALIASES = {
+    'Pre training objectives': ['pre-training', 'pre training', 'objectives'],
+    'Pre trained models': ['pre-trained', 'pre trained'],
+    'Tutorial: Introduction to huggingface': ['huggingface', 'hugging face'],
+    'Fine tuning LLM': ['fine-tuning', 'fine tuning', 'ft'],
+    'Instruction tuning': ['instruction tuning', 'instruction-tuning'],
+    'Prompt based learning': ['prompt based', 'prompt-based'],
+    'Parameter efficient fine tuning': ['peft', 'parameter efficient'],
+    'Incontext Learning': ['in-context', 'incontext', 'icl'],
+    'Prompting methods': ['prompting'],
+    'Retrieval Methods': ['retrieval'],
+    'Retrieval Augmented Generation': ['rag', 'retrieval augmented'],
+    'Quantization': ['quantization', 'quantized'],
+    'Mixture of Experts Model': ['moe', 'mixture of experts'],
+    'Agentic AI': ['agentic', 'agents'],
+    'Multimodal LLMs': ['multimodal', 'multi-modal'],
+    'Vision Language Models': ['vlm', 'vision-language', 'vision language'],
+    'Policy learning using DQN': ['dqn', 'deep q', 'policy gradient'],
+    'RLHF': ['rlhf', 'reinforcement learning from human feedback']
+}
+
+# Module names, aliases and resource titles compiled into one automaton
+keyword_matcher = KeywordMatcher(catalog.ordered_modules, MODULE_ALIASES, catalog.resources)
 
 # Load YouTube links mapping
 _youtube_links_path = os.path.join(os.path.dirname(__file__), 'data', 'youtube_links.json')
@@ -234,36 +370,98 @@ except Exception as e:
     print(f"Could not load YouTube links: {e}")
     for r in nlp_resources: r['youtube_url'] = ''
 
-# Pre-compute module embeddings
-module_embeddings = {}
+# Pre-compute module embeddings: one L2-normalized (modules x dim) float32
+# matrix, row i belonging to module_embedding_modules[i]
+module_embedding_matrix = None
+module_embedding_modules = []
+module_embedding_rows = {}
+
+def module_documents():
+    """(modules, preprocessed texts): one document per module from its resources' titles and descriptions"""
+    modules = list(catalog.ordered_modules)
+    module_docs = {m: " ".join(f"{r['title']} {r.get('description', '')}" for r in catalog.by_module[m])
+                   for m in modules}
+    clean_docs = [utils_preprocess_text(module_docs[m], flg_stemm=False, flg_lemm=True, lst_stopwords=stop_words)
+                  for m in modules]
+    return modules, clean_docs
 
 def compute_module_embeddings():
+    global module_embedding_matrix, module_embedding_modules, module_embedding_rows
     bert_model = get_bert_model()
     if not bert_model:
         return
-        
-    print("Computing module embeddings...")
-    # Group resources by module to form a "document" for each module
-    module_docs = {}
-    for r in nlp_resources:
-        m = r['module']
-        # Combine title and description for a rich representation
-        text = f"{r['title']} {r.get('description', '')}"
-        if m in module_docs:
-            module_docs[m] += " " + text
-        else:
-            module_docs[m] = text
-            
-    # Compute embeddings
-    for m, doc in module_docs.items():
-        # Apply preprocessing
-        clean_doc = utils_preprocess_text(doc, flg_stemm=False, flg_lemm=True, lst_stopwords=stop_words)
-        module_embeddings[m] = bert_model.encode(clean_doc)
-    print(f"Computed embeddings for {len(module_embeddings)} modules")
+
+    modules, clean_docs = module_documents()
+
+    # Reuse the matrix from a previous start when the model and texts are unchanged
+    key = embedding_cache.cache_key(bert_model_key(), modules, clean_docs)
+    matrix = embedding_cache.load(EMBEDDING_CACHE_DIR, key, rows=len(modules))
+    if matrix is not None:
+        print(f"Loaded cached embeddings for {len(modules)} modules")
+    else:
+        # Compute embeddings (one batched encode call)
+        print("Computing module embeddings...")
+        matrix = l2_normalize_rows(bert_model.encode(clean_docs))
+        try:
+            embedding_cache.save(EMBEDDING_CACHE_DIR, key, matrix)
+        except OSError as e:
+            print(f"Warning: Could not persist module embeddings: {e}")
+        print(f"Computed embeddings for {len(modules)} modules")
+    module_embedding_matrix = matrix
+    module_embedding_modules = modules
+    module_embedding_rows = {m: i for i, m in enumerate(modules)}
+
+def module_similarities(summary_embeddings):
+    """
+    Cosine similarity of one summary embedding (dim,) or a batch (n, dim)
+    to every module, as one matrix product. Columns follow module_embedding_modules.
+    """
+    return get_cos_sim_matrix(summary_embeddings, module_embedding_matrix)
+
+def bert_module_scores(similarities, keywords_found=(), visited_counts=None):
+    """
+    module_scores (catalog.ordered_modules order) from one summary's module
+    similarities: clipped similarity, +0.3 for a keyword hit, +0.1 per visited resource.
+    """
+    scores = []
+    for module in catalog.ordered_modules:
+        score = 0.0
+        row = module_embedding_rows.get(module)
+        if row is not None:
+            score = max(0.0, float(similarities[row]))
+        if module in keywords_found: score += 0.3
+        module_visited_count = visited_counts[module] if visited_counts else 0
+        if module_visited_count > 0: score += 0.1 * module_visited_count
+        scores.append(float(max(0.0, min(1.0, score))))
+    return scores
 
 # Compute embeddings on startup for immediate availability
 compute_module_embeddings()
 
+# =============================================
+# CONDITIONAL GET (ETag / 304)
+# =============================================
+
+# Catalog-only responses may be reused briefly; data responses always revalidate
+CACHE_CONTROL_CATALOG = 'public, max-age=60'
+CACHE_CONTROL_SHARED = 'no-cache'
+CACHE_CONTROL_PRIVATE = 'private, no-cache'
+
+def conditional_response(etag_parts, build, cache_control=CACHE_CONTROL_SHARED):
+    """
+    Strong ETag from the version stamps the response depends on; answers
+    If-None-Match hits with 304 without calling build(), which returns the body.
+    """
+    etag = hashlib.sha256("|".join(str(p) for p in etag_parts).encode('utf-8')).hexdigest()[:32]
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = build()
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+
 # =============================================
 # RESOURCES ENDPOINTS
 # =============================================
@@ -282,6 +480,16 @@ def reset_database():
     except Exception as e:
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Runtime counters for the storage layer, the encoder and the summary embedding cache"""
+    encoder = get_encoder()
+    return jsonify({
+        'db_cache': get_cache_stats(),
+        'encoder': encoder.stats() if encoder else None,
+        'summary_cache': summary_cache.stats(),
+    })
+
 @app.route('/api/resources', methods=['GET'])
 def get_resources():
     # RELOAD CSV DYNAMICALLY FOR DEV
@@ -296,25 +504,31 @@ def get_resources():
     """Get all NLP learning resources with their grid positions and correct visited state"""
     session_id = request.args.get('session_id', 'default')
     session = get_session(session_id)
-    visited_ids = set(str(v).strip() for v in session.get('visitedResources', []))
-    
-    # Return a copy of resources with updated visited flags
-    updated_resources = []
-    for r in nlp_resources:
-        r_copy = r.copy()
-        r_copy['visited'] = str(r['id']).strip() in visited_ids
-        updated_resources.append(r_copy)
-    
-    return jsonify(updated_resources)
+
+    def build():
+        visited_ids = set(str(v).strip() for v in session.get('visitedResources', []))
+
+        # Return a copy of resources with updated visited flags
+        updated_resources = []
+        for r in catalog.resources:
+            r_copy = r.copy()
+            r_copy['visited'] = str(r['id']).strip() in visited_ids
+            updated_resources.append(r_copy)
+        return jsonify(updated_resources)
+
+    # Visited flags come from the session: the ETag follows its data version
+    return conditional_response(('resources', catalog.version, session_id, data_version(session_id)),
+                                build, CACHE_CONTROL_PRIVATE)
 
 
 @app.route('/api/resources/<resource_id>', methods=['GET'])
 def get_resource(resource_id):
     """Get a single resource by ID"""
-    resource = next((r for r in nlp_resources if r['id'] == resource_id), None)
+    resource = catalog.get(resource_id)
     if not resource:
         return jsonify({'error': 'Resource not found'}), 404
-    return jsonify(resource)
+    return conditional_response(('resource', catalog.version, resource_id), lambda: jsonify(resource),
+                                CACHE_CONTROL_CATALOG)
 
 
 # =============================================
@@ -418,7 +632,7 @@ def visit_resource():
     session = get_session(session_id)
     
     # Find resource
-    resource = next((r for r in nlp_resources if r['id'] == resource_id), None)
+    resource = catalog.get(resource_id)
     if not resource:
         return jsonify({'error': 'Resource not found'}), 404
     
@@ -439,12 +653,88 @@ def visit_resource():
 # LEARNING SUMMARY ENDPOINTS
 # =============================================
 
+# Opt-in asynchronous processing: POST /api/summary/create?async=1 (or
+# {"async": true}, or SUMMARY_ASYNC=1 for every request) returns a job id
+SUMMARY_ASYNC = os.getenv('SUMMARY_ASYNC', '0') == '1'
+SUMMARY_JOBS_DIR = os.getenv('SUMMARY_JOBS_DIR', os.path.join(os.path.dirname(__file__), 'data', 'jobs'))
+# How long clients wait between polls of a pending job (SSE 'retry' / Retry-After)
+SUMMARY_EVENTS_RETRY_MS = int(os.getenv('SUMMARY_EVENTS_RETRY_MS', '1000'))
+summary_jobs = JobManager(
+    SUMMARY_JOBS_DIR,
+    workers=int(os.getenv('SUMMARY_JOB_WORKERS', '2')),
+    max_pending=int(os.getenv('SUMMARY_JOB_QUEUE', '16')),
+)
+
+def _wants_async(data):
+    flag = request.args.get('async', data.get('async', SUMMARY_ASYNC))
+    return str(flag).lower() in ('1', 'true', 'yes')
+
 @app.route('/api/summary/create', methods=['POST'])
 def create_learning_summary():
     """
     Create a learning summary from visited resources
     """
-    data = request.get_json()
+    data = request.get_json() or {}
+    if _wants_async(data):
+        if not data.get('title') or not data.get('summary'):
+            return jsonify({'error': 'Title and summary required'}), 400
+        try:
+            job = summary_jobs.submit(process_learning_summary, data)
+        except QueueFull:
+            return jsonify({'error': 'Too many summaries in progress, retry shortly'}), 503, {'Retry-After': '2'}
+        return jsonify({
+            'job_id': job['id'],
+            'status': job['status'],
+            'status_url': f"/api/summary/jobs/{job['id']}",
+            'events_url': f"/api/summary/jobs/{job['id']}/events",
+        }), 202
+
+    payload, status = process_learning_summary(data)
+    return jsonify(payload), status
+
+
+@app.route('/api/summary/jobs/<job_id>', methods=['GET'])
+def get_summary_job(job_id):
+    """Status of an asynchronous summary; 'result' holds the /api/summary/create payload when done"""
+    job = summary_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    if job['status'] not in FINISHED:
+        return jsonify(job), 200, {'Retry-After': str(max(1, -(-SUMMARY_EVENTS_RETRY_MS // 1000)))}
+    return jsonify(job)
+
+
+@app.route('/api/summary/jobs/<job_id>/events', methods=['GET'])
+def stream_summary_job(job_id):
+    """
+    Server-sent events, short-polled: every request answers at once with a
+    'status' event if the status changed since Last-Event-ID, plus one
+    'result' event (the final job record) once the job finished. The 'retry'
+    field makes EventSource reconnect after SUMMARY_EVENTS_RETRY_MS, so no
+    HTTP worker is held while the job runs; 204 ends the stream once the
+    result was delivered.
+    """
+    job = summary_jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Job not found'}), 404
+    last_event_id = request.headers.get('Last-Event-ID')
+    if last_event_id == 'result':
+        return '', 204
+
+    body = f"retry: {SUMMARY_EVENTS_RETRY_MS}\n\n"
+    if job['status'] != last_event_id:
+        body += f"id: {job['status']}\nevent: status\ndata: {json.dumps({'job_id': job_id, 'status': job['status']})}\n\n"
+    if job['status'] in FINISHED:
+        body += f"id: result\nevent: result\ndata: {json.dumps(job)}\n\n"
+    return Response(body, mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+def process_learning_summary(data):
+    """
+    Score and store a learning summary. Independent of the Flask request so
+    it can run inside a background job; returns (payload, HTTP status).
+    """
     session_id = data.get('session_id', 'default')
     session = get_session(session_id)
     title = data.get('title', '')
@@ -452,11 +742,10 @@ def create_learning_summary():
     visited_ids = data.get('visited_resources', [])
     
     if not title or not summary:
-        return jsonify({'error': 'Title and summary required'}), 400
+        return {'error': 'Title and summary required'}, 400
     
     # Get visited resources using robust ID matching
-    visited_set = set(str(v).strip() for v in visited_ids)
-    visited_resources = [r for r in nlp_resources if str(r['id']).strip() in visited_set]
+    visited_resources, _ = catalog.split_visited(visited_ids)
     
     print(f"[DEBUG] create_learning_summary: incoming visited_ids={visited_ids}, matched count={len(visited_resources)}")
     
@@ -465,100 +754,52 @@ def create_learning_summary():
     total_reward = sum(r['reward'] for r in visited_resources)
     avg_difficulty = total_difficulty / len(visited_resources) if visited_resources else 0
     
-    # Extract unique modules from resources (preserving order)
-    seen_modules = set()
-    ordered_modules = []
-    for r in nlp_resources:
-        m = r['module']
-        if m not in seen_modules:
-            ordered_modules.append(m)
-            seen_modules.add(m)
+    # Unique modules from resources (preserving order)
+    ordered_modules = catalog.ordered_modules
     
-    # Module Aliases for better keyword matching
-    module_aliases = {
-        'Pre training objectives': ['pre-training', 'pre training', 'objectives'],
-        'Pre trained models': ['pre-trained', 'pre trained'],
-        'Tutorial: Introduction to huggingface': ['huggingface', 'hugging face'],
-        'Fine tuning LLM': ['fine-tuning', 'fine tuning', 'ft'],
-        'Instruction tuning': ['instruction tuning', 'instruction-tuning'],
-        'Prompt based learning': ['prompt based', 'prompt-based'],
-        'Parameter efficient fine tuning': ['peft', 'parameter efficient'],
-        'Incontext Learning': ['in-context', 'incontext', 'icl'],
-        'Prompting methods': ['prompting'],
-        'Retrieval Methods': ['retrieval'],
-        'Retrieval Augmented Generation': ['rag', 'retrieval augmented'],
-        'Quantization': ['quantization', 'quantized'],
-        'Mixture of Experts Model': ['moe', 'mixture of experts'],
-        'Agentic AI': ['agentic', 'agents'],
-        'Multimodal LLMs': ['multimodal', 'multi-modal'],
-        'Vision Language Models': ['vlm', 'vision-language', 'vision language'],
-        'Policy learning using DQN': ['dqn', 'deep q', 'policy gradient'],
-        'RLHF': ['rlhf', 'reinforcement learning from human feedback']
-    }
-
-    # Check for keywords in summary text
-    summary_lower = summary.lower()
-    keywords_found = []
-    
-    for module in ordered_modules:
-        if module.lower() in summary_lower:
-            keywords_found.append(module)
-            continue
-        aliases = module_aliases.get(module, [])
-        for alias in aliases:
-            if alias.lower() in summary_lower:
-                keywords_found.append(module)
-                break
-    for r in visited_resources:
-        if r['title'].lower() in summary_lower and r['title'] not in keywords_found:
-            keywords_found.append(r['title'])
+    # Module names, aliases and visited titles found in the summary (one pass)
+    keywords_found = keyword_matcher.match(summary, visited_resources)
 
     # Calculate module scores for polyline
     module_scores = []
+    visited_counts = Counter(r['module'] for r in visited_resources)
     log_polyline_step("START_GENERATION", f"Generating polyline for summary: '{summary[:100]}...'")
 
     bert_model = get_bert_model()
     if bert_model:
-        if not module_embeddings:
+        if module_embedding_matrix is None:
             compute_module_embeddings()
             
         try:
-            clean_summary = utils_preprocess_text(summary, flg_stemm=False, flg_lemm=True, lst_stopwords=stop_words)
-            summary_embedding = bert_model.encode(clean_summary)
-            for module in ordered_modules:
-                score = 0.0
-                if module in module_embeddings:
-                    sim = get_cos_sim(summary_embedding, module_embeddings[module])
-                    score = max(0.0, sim)
-                if module in keywords_found: score += 0.3
-                module_visited_count = sum(1 for r in visited_resources if r['module'] == module)
-                if module_visited_count > 0: score += 0.1 * module_visited_count
-                module_scores.append(float(max(0.0, min(1.0, score))))
+            summary_embedding = encode_summary(summary)
+            # All module similarities from a single matrix-vector product
+            similarities = module_similarities(summary_embedding)
+            module_scores = bert_module_scores(similarities, keywords_found, visited_counts)
         except Exception as e:
             print(f"Error computing BERT scores: {e}")
             for module in ordered_modules:
                 score = 0.5 + (np.random.random() - 0.5) * 0.1
                 if module in keywords_found: score += 0.2
-                module_visited_count = sum(1 for r in visited_resources if r['module'] == module)
+                module_visited_count = visited_counts[module]
                 if module_visited_count > 0: score += 0.1 * module_visited_count
                 module_scores.append(float(max(0.0, min(1.0, score))))
     else:
         for module in ordered_modules:
             score = 0.5 + (np.random.random() - 0.5) * 0.1
             if module in keywords_found: score += 0.2
-            module_visited_count = sum(1 for r in visited_resources if r['module'] == module)
+            module_visited_count = visited_counts[module]
             if module_visited_count > 0: score += 0.1 * module_visited_count
             module_scores.append(float(max(0.0, min(1.0, score))))
 
     # ── DQN Recommendation ──
-    rec_result = navigator.recommend_next(visited_ids, module_scores, nlp_resources)
+    rec_result = navigator.recommend_next(visited_ids, module_scores, catalog.resources)
     next_recommendation_obj = rec_result.get('resource')
     
     recommendations = []
     if next_recommendation_obj:
         recommendations.append(next_recommendation_obj['title'])
     
-    unvisited_remaining = [r for r in nlp_resources if r['id'] not in visited_ids and r['title'] not in recommendations]
+    unvisited_remaining = [r for r in catalog.resources if r['id'] not in visited_ids and r['title'] not in recommendations]
     unvisited_remaining.sort(key=lambda r: (-r.get('reward', 0), r.get('difficulty', 0)))
     for r in unvisited_remaining:
         if len(recommendations) < 3: recommendations.append(r['title'])
@@ -567,13 +808,8 @@ def create_learning_summary():
     strengths = keywords_found if keywords_found else [r['title'] for r in visited_resources if r.get('difficulty', 0) <= 2]
 
     # Analysis results
-    polylines = get_db_polylines()
-    from collections import Counter
-    all_keywords = []
-    for p in polylines.values():
-        if 'keywords_found' in p: all_keywords.extend(p['keywords_found'])
-    all_keywords.extend(keywords_found)
-    keyword_counts = Counter(all_keywords)
+    keyword_counts = Counter(get_polyline_stats()['keywords'])
+    keyword_counts.update(keywords_found)
     most_common_keywords = [k for k, v in keyword_counts.most_common(3)]
     dominant_topics = most_common_keywords
     
@@ -585,7 +821,7 @@ def create_learning_summary():
     total_earned_base_pts = 0
     high_line_sum = 0
     for module, score in scored_modules:
-        resource = next((r for r in nlp_resources if r['module'] == module), None)
+        resource = catalog.first_in_module(module)
         if resource:
             hl = float(resource.get('high_line', 0.8))
             high_line_sum += hl
@@ -614,11 +850,7 @@ def create_learning_summary():
 
     # Recommendations: Unvisited modules with high rewards or logical next steps
     visited_module_names = set(r['module'] for r in visited_resources)
-    all_module_names = set(r['module'] for r in nlp_resources)
-    unvisited_modules = list(all_module_names - visited_module_names)
-    
-    # Sort unvisited modules by order in ORDERED_MODULES
-    unvisited_modules.sort(key=lambda m: ordered_modules.index(m) if m in ordered_modules else 99)
+    unvisited_modules = [m for m in ordered_modules if m not in visited_module_names]
     
     # Combine BERT scores with sequential progression for recommendations
     recommendations = unvisited_modules[:3] if unvisited_modules else [m for m, s in scored_modules if s <= 0.3][:3]
@@ -627,7 +859,7 @@ def create_learning_summary():
     summary_result = {
         'id': f"summary_{session_id}_{timestamp_id}",
         'title': title, 'summary': summary, 'keywords_found': keywords_found,
-        'totalResources': len(nlp_resources), 'visitedResources': len(visited_resources),
+        'totalResources': len(catalog), 'visitedResources': len(visited_resources),
         'currentLevel': session['level'],
         'strengths': strengths, 'recommendations': recommendations,
         'ai_analysis': ai_analysis,
@@ -635,7 +867,7 @@ def create_learning_summary():
         'xp_earned': xp_earned,
         'timestamp': int(datetime.now().timestamp() * 1000)
     }
-    save_summary(summary_result)
+    save_summary(summary_result, session_id=session_id)
 
     # Final result construction — compute true 2D assimilation position
     # using the radial-axis dimensionality reduction (Equations 6-12)
@@ -646,7 +878,8 @@ def create_learning_summary():
     
     polyline_id = f"polyline_{timestamp_id}"
     new_polyline = {
-        'id': polyline_id, 'name': title, 'path': [r['position'] for r in visited_resources],
+        'id': polyline_id, 'name': title, 'timestamp': summary_result['timestamp'],
+        'path': [r['position'] for r in visited_resources],
         'color': f'rgba({np.random.randint(100,200)}, {np.random.randint(100,200)}, 255, 0.4)',
         'isActive': False, 'summary': summary, 'keywords_found': keywords_found,
         'module_scores': module_scores, 'strengths': strengths, 'dominant_topics': dominant_topics,
@@ -656,20 +889,12 @@ def create_learning_summary():
             'position': next_recommendation_obj['position'], 'module': rec_result['module'], 'reason': rec_result['reason']
         } if next_recommendation_obj else None
     }
-    save_polyline(polyline_id, new_polyline)
+    save_polyline(polyline_id, new_polyline, session_id=session_id)
     
-    # Calculate updated average polyline
-    all_polylines = get_db_polylines()
-    history_scores = [p.get('module_scores', []) for p in all_polylines.values() if p.get('module_scores')]
-    num_histories = len(history_scores)
-    avg_scores = [0.0] * 19
-    if num_histories > 0:
-        for scores in history_scores:
-            for i, s in enumerate(scores):
-                if i < 19: avg_scores[i] += s
-        avg_scores = [s / num_histories for s in avg_scores]
+    # Updated average polyline, read from the running stats
+    avg_scores = polyline_stats.average(get_polyline_stats(), 19)
 
-    return jsonify({
+    return {
         'polyline': new_polyline,
         'average_polyline': {
             'id': 'current_average',
@@ -683,109 +908,123 @@ def create_learning_summary():
         'keywords_found': keywords_found,
         'totalReward': session['totalReward'],
         'xp_earned': xp_earned
-    })
+    }, 200
 
 
 # =============================================
 # POLYLINE ENDPOINTS
 # =============================================
 
+def _encode_cursor(ts, polyline_id):
+    return base64.urlsafe_b64encode(json.dumps([ts, polyline_id]).encode('utf-8')).decode('ascii')
+
+def _decode_cursor(cursor):
+    ts, polyline_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    return int(ts), str(polyline_id)
+
+def _project(record, fields):
+    """Only the requested keys (plus 'id') of a polyline"""
+    return {k: record[k] for k in fields if k in record}
+
 @app.route('/api/polylines', methods=['GET'])
 def get_polylines_route():
-    """Get all polylines including dynamically generated High Line and Current Average polylines"""
-    polylines = get_db_polylines()
-    
-    # Generate ordered_modules to ensure consistent mapping
-    seen_modules = set()
-    ordered_modules = []
-    for r in nlp_resources:
-        m = r['module']
-        if m not in seen_modules:
-            ordered_modules.append(m)
-            seen_modules.add(m)
-            
-    # Compute average module scores across all historical polylines
-    import math
-    history_scores = [p.get('module_scores', []) for p in polylines.values() if p.get('module_scores')]
-    num_histories = len(history_scores)
-    
-    avg_module_scores = [0.0] * len(ordered_modules)
-    if num_histories > 0:
-        for scores in history_scores:
-            # Ensure we only average up to the length of ordered_modules
-            for i, s in enumerate(scores):
-                if i < len(avg_module_scores):
-                    avg_module_scores[i] += s
-        avg_module_scores = [s / num_histories for s in avg_module_scores]
-    else:
-        # Default to some base value if no histories exist
-        avg_module_scores = [0.1] * len(ordered_modules)
-        
-    # Sort resources by angle (origin is 0, 19)
-    def compute_angle(r):
-        return math.atan2(19 - r['position']['y'], r['position']['x'])
-        
-    resources_sorted = sorted(nlp_resources, key=compute_angle)
-    
-    high_line_path = []
-    current_path = []
-    
-    for r in resources_sorted:
-        dx = r['position']['x']
-        dy = 19 - r['position']['y']
-        radius = math.hypot(dx, dy)
-        theta = math.atan2(dy, dx)
-        
-        # High Line
-        hl = float(r.get('high_line', 0.8))
-        hl_rad = radius * hl
-        hl_x = hl_rad * math.cos(theta)
-        hl_y = 19 - hl_rad * math.sin(theta)
-        high_line_path.append({'x': hl_x, 'y': hl_y})
-        
-        # Current Average
-        try:
-            m_idx = ordered_modules.index(r['module'])
-            avg_s = avg_module_scores[m_idx] if num_histories > 0 else 0.0
-        except ValueError:
-            avg_s = 0.0
-            
-        cur_rad = radius * avg_s
-        cur_x = cur_rad * math.cos(theta)
-        cur_y = 19 - cur_rad * math.sin(theta)
-        current_path.append({'x': cur_x, 'y': cur_y})
-        
-    # Create the virtual polylines. Close the loops by adding the first point to the end.
-    if high_line_path:
-        high_line_path.append(high_line_path[0])
-    if current_path:
-        current_path.append(current_path[0])
-
-    # Compute assimilation positions for virtual polylines via radial mapper
-    hl_scores = [float(r.get('high_line', 0.8)) for r in resources_sorted]
-    # Ensure we use per-module high_line scores (one per ordered module)
-    hl_module_scores = []
-    for m in ordered_modules:
-        res = next((r for r in nlp_resources if r['module'] == m), None)
-        hl_module_scores.append(float(res.get('high_line', 0.8)) if res else 0.8)
-
-    hl_assimilation = radial_mapper.polyline_to_grid(
-        hl_module_scores, num_topics=len(ordered_modules)
-    )
+    """
+    Get all polylines including dynamically generated High Line and Current Average polylines.
+
+    Optional query parameters (without them every polyline is returned, as before):
+        session_id  only this learner's polylines; the average is theirs too
+        since       only polylines created at or after this timestamp (ms)
+        limit       page size, oldest first; the next page's cursor is sent in X-Next-Cursor
+        cursor      X-Next-Cursor of the previous page
+        fields      comma-separated projection, e.g. id,name,module_scores,assimilation_position
+        virtual     1 (default) appends the two virtual polylines (to the first
+                    page only when paging), 0 omits them, 'only' returns just
+                    them (constant-size dashboard load)
+    """
+    session_id = request.args.get('session_id') or None
+    virtual = request.args.get('virtual', '1').lower()
+    fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()] or None
+    if fields and 'id' not in fields:
+        fields.insert(0, 'id')
+    try:
+        since = int(request.args['since']) if request.args.get('since') else None
+        limit = int(request.args['limit']) if request.args.get('limit') else None
+        cursor = _decode_cursor(request.args['cursor']) if request.args.get('cursor') else None
+    except (ValueError, TypeError):
+        return jsonify({'error': 'since and limit must be integers and cursor a value from X-Next-Cursor'}), 400
+    if limit is not None and limit < 1:
+        return jsonify({'error': 'limit must be positive'}), 400
+
+    # Unchanged data (same polyline / session version and query) is answered with 304
+    etag_parts = ('polylines', catalog.version, session_id, data_version(session_id),
+                  request.query_string.decode('utf-8'))
+    return conditional_response(etag_parts,
+                                lambda: _polylines_response(session_id, virtual, fields, since, limit, cursor),
+                                CACHE_CONTROL_PRIVATE if session_id else CACHE_CONTROL_SHARED)
+
+def _polylines_response(session_id, virtual, fields, since, limit, cursor):
+    """Historical polylines (filtered / paged / projected) followed by the virtual ones"""
+    result = []
+    next_cursor = None
+    if virtual != 'only':
+        polylines = get_db_polylines(session_id=session_id)
+        items = polylines.items()
+        if since is not None or limit is not None or cursor is not None:
+            # Stable (timestamp, id) order so cursors stay valid while new polylines arrive
+            keyed = sorted(((polyline_timestamp(pid, p), pid), p) for pid, p in polylines.items())
+            if since is not None:
+                keyed = [(key, p) for key, p in keyed if key[0] >= since]
+            if cursor is not None:
+                keyed = [(key, p) for key, p in keyed if key > cursor]
+            if limit is not None and len(keyed) > limit:
+                keyed = keyed[:limit]
+                next_cursor = _encode_cursor(*keyed[-1][0])
+            items = [(key[1], p) for key, p in keyed]
+
+        # Historical polylines are returned inactive; long text is only fetched when requested
+        for _, p in items:
+            if fields is None:
+                p_copy = hydrate_text(p)
+            else:
+                p_copy = _project(hydrate_text(p) if 'summary' in fields else p, fields)
+            if fields is None or 'isActive' in fields:
+                p_copy['isActive'] = False # Strictly disable historical polylines
+            result.append(p_copy)
+
+    # Paging clients get the virtual polylines once, on the first page
+    if virtual not in ('0', 'false', 'no') and cursor is None:
+        for virtual_polyline in _virtual_polylines(session_id):
+            result.append(_project(virtual_polyline, fields) if fields else virtual_polyline)
+
+    response = jsonify(result)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+def _virtual_polylines(session_id=None):
+    """The High Line and the Current Average polyline (of all learners, or of one)"""
+    # Average module scores across all historical polylines (running stats, O(modules))
+    stats = get_polyline_stats(session_id=session_id)
+    # Default to some base value if no histories exist
+    avg_module_scores = polyline_stats.average(stats, len(catalog.ordered_modules), default=0.1)
+
+    # Resource angles, radii and the whole high line are static (cached in the catalog);
+    # only the average path is scaled per request
+    current_path = catalog.polar_path(avg_module_scores if stats['count'] else None)
     cur_assimilation = radial_mapper.polyline_to_grid(
-        avg_module_scores, num_topics=len(ordered_modules)
+        avg_module_scores, num_topics=len(catalog.ordered_modules)
     )
 
     hl_polyline = {
         'id': 'high_line',
         'name': 'Peak Potential',
-        'path': high_line_path,
-        'module_scores': hl_module_scores,
+        'path': catalog.high_line_path,
+        'module_scores': catalog.high_line_scores,
         'color': 'rgba(239, 68, 68, 0.8)', # Red
         'isActive': True,
         'confidence': 1.0,
         'summary': 'Target threshold for each module',
-        'assimilation_position': hl_assimilation
+        'assimilation_position': catalog.high_line_assimilation
     }
     
     cur_polyline = {
@@ -800,31 +1039,17 @@ def get_polylines_route():
         'assimilation_position': cur_assimilation
     }
 
-    # Format result: Return ONLY the virtual polylines, or include histories?
-    # User said "everywhere it should be shown like a high polyline... and current should be average of all histories"
-    # We will return the historical ones but set them to inactive, and these two to strictly active.
-    
-    # Format result: Return ONLY the virtual polylines as active
-    result = []
-    for p in polylines.values():
-        p_copy = p.copy()
-        p_copy['isActive'] = False # Strictly disable historical polylines
-        result.append(p_copy)
-        
-    result.append(hl_polyline)
-    result.append(cur_polyline)
-    
-    return jsonify(result)
+    # Shown after the historical polylines (which are inactive)
+    return [hl_polyline, cur_polyline]
 
 
 @app.route('/api/polylines/<polyline_id>', methods=['GET'])
 def get_polyline(polyline_id):
     """Get a specific polyline"""
-    polylines = get_db_polylines()
-    polyline = polylines.get(polyline_id)
+    polyline = find_polylines([polyline_id]).get(polyline_id)
     if not polyline:
         return jsonify({'error': 'Polyline not found'}), 404
-    return jsonify(polyline)
+    return jsonify(hydrate_text(polyline))
 
 
 @app.route('/api/polylines/<polyline_id>/toggle', methods=['POST'])
@@ -833,14 +1058,116 @@ def toggle_polyline(polyline_id):
     data = request.get_json()
     is_active = data.get('isActive', False)
     
-    polylines = get_db_polylines()
-    polyline = polylines.get(polyline_id)
+    polyline = find_polylines([polyline_id]).get(polyline_id)
     if not polyline:
         return jsonify({'error': 'Polyline not found'}), 404
     
-    polyline['isActive'] = is_active
+    polyline = dict(polyline, isActive=is_active)  # never mutate a store-cached record
     save_polyline(polyline_id, polyline)
-    return jsonify(polyline)
+    return jsonify(hydrate_text(polyline))
+
+
+# =============================================
+# DELTA SYNC
+# =============================================
+
+def _parse_sync_token(token, epoch):
+    """Version a token from a previous /api/sync covers ('<epoch>.<version>'), or None when a full resync is needed"""
+    if not token:
+        return None
+    token_epoch, _, seq = token.rpartition('.')
+    seq = int(seq)
+    if token_epoch and token_epoch != epoch:
+        # The database was reset or replaced since that token was issued
+        return None
+    return seq
+
+def _changed_ids(changes, kinds):
+    """Ids of the logged changes of the given kinds, oldest first, without repeats"""
+    return list(dict.fromkeys(key for kind, key in changes if kind in kinds))
+
+def _sync_polylines(since):
+    """Polylines added, updated or deleted after version `since` (all of them when since is None)"""
+    changes = changes_since(since) if since is not None else None
+    if changes is None:
+        polylines, deleted = get_db_polylines(), []
+    else:
+        polylines = find_polylines(_changed_ids(changes, ('polyline',)))
+        deleted = [pid for pid in _changed_ids(changes, ('polyline_deleted',)) if pid not in polylines]
+    changed = []
+    for p in polylines.values():
+        p_copy = hydrate_text(p)
+        p_copy['isActive'] = False # Historical polylines are returned inactive, as by /api/polylines
+        changed.append(p_copy)
+    return {
+        'full': changes is None,
+        'changed': changed,
+        'deleted': deleted,
+        # The average moves with every polyline write
+        'virtual': _virtual_polylines() if changes is None or changes else [],
+    }
+
+def _sync_session(session_id, since):
+    """Session fields, notifications, notes and bookmarks changed after version `since`"""
+    changes = changes_since(since, session_id=session_id) if since is not None else None
+    if changes is not None and any(kind == 'reset' for kind, _ in changes):
+        # Reset or restored from the archive: replace, do not merge
+        changes = None
+    session = get_session(session_id)
+    notifications = session.get('notifications', [])
+    if changes is None:
+        return {
+            'full': True,
+            'fields': {k: v for k, v in session.items() if k != 'notifications'},
+            'notifications': notifications,
+            'notes': get_notes(session_id),
+            'bookmarks': get_db_bookmarks(session_id),
+        }
+    notification_ids = set(_changed_ids(changes, ('notification',)))
+    note_ids = set(_changed_ids(changes, ('note',)))
+    return {
+        'full': False,
+        'fields': {k: session.get(k) for k in _changed_ids(changes, ('session',))},
+        'notifications': [n for n in notifications if n.get('id') in notification_ids],
+        'notes': [n for n in get_notes(session_id) if n.get('id') in note_ids] if note_ids else [],
+        # Bookmarks are a short list of ids: sent whole when they changed, null otherwise
+        'bookmarks': get_db_bookmarks(session_id) if any(kind == 'bookmarks' for kind, _ in changes) else None,
+    }
+
+@app.route('/api/sync', methods=['GET'])
+def sync_route():
+    """
+    Everything that changed since a previous sync, so clients refresh in
+    proportion to recent activity instead of re-downloading their history.
+
+    Query parameters:
+        since       'seq' of the previous response; omitted (or from before a
+                    database reset, or older than the change log) -> full sync
+        session_id  also return this learner's changed session fields,
+                    notifications, notes and bookmarks
+
+    Response: {'seq', 'polylines': {full, changed, deleted, virtual},
+               'session': {full, fields, notifications, notes, bookmarks}}
+    A part with full=true replaces the client's copy; otherwise it is merged.
+    """
+    session_id = request.args.get('session_id') or None
+    epoch = data_epoch()
+    try:
+        since = _parse_sync_token(request.args.get('since'), epoch)
+    except ValueError:
+        return jsonify({'error': "since must be the 'seq' of a previous /api/sync response"}), 400
+
+    if session_id:
+        # Created (or restored from the archive) now rather than after the token is taken
+        get_session(session_id)
+    # Taken before the data and trailing the clock: a write racing this request is sent again next time
+    seq = sync_watermark()
+    result = {'seq': f"{epoch}.{seq}", 'polylines': _sync_polylines(since)}
+    if session_id:
+        result['session'] = _sync_session(session_id, since)
+    response = jsonify(result)
+    response.headers['Cache-Control'] = CACHE_CONTROL_PRIVATE
+    return response
 
 
 
@@ -875,7 +1202,7 @@ def generate_dqn_path():
     rec = navigator.recommend_next(
         visited_ids=visited_ids,
         module_scores=latest_scores,
-        nlp_resources=nlp_resources
+        nlp_resources=catalog.resources
     )
 
     # Build a path: agent → recommended resource, plus up to 4 more close unvisited
@@ -885,7 +1212,7 @@ def generate_dqn_path():
     if rec['resource']:
         path.append(rec['resource']['position'])
         # Add up to 4 more nearest unvisited resources
-        remaining = [r for r in nlp_resources 
+        remaining = [r for r in catalog.resources
                      if str(r['id']).strip() not in visited_set and r['id'] != rec['resource']['id']]
         remaining.sort(key=lambda r: (
             (r['position']['x'] - rec['resource']['position']['x'])**2 +
@@ -895,7 +1222,7 @@ def generate_dqn_path():
             path.append(r['position'])
 
     final_resource = rec['resource']
-    total_reward = sum(r['reward'] for r in nlp_resources
+    total_reward = sum(r['reward'] for r in catalog.resources
                        if r['position'] in path[1:]) if path else 0
 
     return jsonify({
@@ -927,7 +1254,7 @@ def get_next_recommendation():
     rec = navigator.recommend_next(
         visited_ids=visited_ids,
         module_scores=latest_scores,
-        nlp_resources=nlp_resources
+        nlp_resources=catalog.resources
     )
 
     return jsonify(rec)
@@ -943,13 +1270,11 @@ def get_learning_data():
     session_id = request.args.get('session_id', 'default')
     session = get_session(session_id)
     
-    visited_ids = set(str(v).strip() for v in session.get('visitedResources', []))
-    visited_resources = [r for r in nlp_resources if str(r['id']).strip() in visited_ids]
+    visited_resources, unvisited = catalog.split_visited(session.get('visitedResources', []))
     
     # Defaults
     strengths = [r['title'] for r in visited_resources if r.get('difficulty', 0) <= 2]
     # Recommendations using rewarding modules that are unvisited
-    unvisited = [r for r in nlp_resources if str(r['id']).strip() not in visited_ids]
     unvisited.sort(key=lambda r: (-r.get('reward', 0), r.get('difficulty', 0)))
     recommendations = [r['title'] for r in unvisited[:3]]
     
@@ -957,13 +1282,8 @@ def get_learning_data():
     ai_analysis = ""
     xp_earned = 0
     try:
-        try:
-            from .database import load_db
-        except (ImportError, ValueError):
-            from database import load_db
-        db = load_db()
-        # Find latest summary for this session (they contain session_id in their ID or we match title)
-        matching_summaries = [s for s in db.get('summaries', []) if f"summary_{session_id}" in s.get('id', '')]
+        # Find latest summary for this session (looked up through the session index)
+        matching_summaries = get_db_summaries(session_id=session_id)
         if matching_summaries:
             latest = matching_summaries[-1]
             if latest.get('strengths'):
@@ -979,17 +1299,15 @@ def get_learning_data():
     # Calculate Student's Highline Persona
     persona_data = None
     try:
-        # Use existing top-level import get_db_polylines
-        all_polylines = get_db_polylines()
-        history_scores = [p.get('module_scores', []) for p in all_polylines.values() if p.get('module_scores')]
+        # Only this learner's polylines contribute to their highline
+        stats = get_polyline_stats(session_id=session_id)
         
-        if history_scores:
-            print(f"[PERSONA] Calculating from {len(history_scores)} historical vectors")
-            # Calculate component-wise maximum (The Student's Highline)
-            # Ensure vectors are padded to 19 to match the current GMM model
-            arrays = [np.array(s + [0.0]*(19-len(s)))[:19] for s in history_scores]
-            highline_vector = np.maximum.reduce(arrays)
-            persona_data = persona_service.classify_persona(highline_vector.tolist())
+        if stats['count']:
+            print(f"[PERSONA] Calculating from {stats['count']} historical vectors")
+            # Component-wise maximum (The Student's Highline), kept by the running stats
+            # Vectors are padded to 19 to match the current GMM model
+            highline_vector = polyline_stats.highline(stats, 19)
+            persona_data = persona_service.classify_persona(highline_vector)
         else:
             print("[PERSONA] No historical scores found, using default vector")
             # Initial persona for new students
@@ -1005,13 +1323,7 @@ def get_learning_data():
     try:
         # 1. Add Summary Activity
         # Filter summaries by session_id to isolate user data
-        try:
-            from .database import load_db
-        except (ImportError, ValueError):
-            from database import load_db
-        db = load_db()
-        all_summaries = db.get('summaries', [])
-        matching_summaries = [s for s in all_summaries if f"summary_{session_id}" in s.get('id', '')]
+        matching_summaries = get_db_summaries(session_id=session_id)
         
         for s in matching_summaries:
             s_id = s.get('id', '')
@@ -1069,12 +1381,11 @@ def get_learning_data():
         print(f"Error calculating activity log: {e}")
 
     # Find most visited module
-    from collections import Counter
     module_counts = Counter(r['module'] for r in visited_resources)
     most_visited_module = module_counts.most_common(1)[0][0] if module_counts else "None"
 
     return jsonify({
-        'totalResources': len(nlp_resources),
+        'totalResources': len(catalog),
         'visitedResources': len(visited_resources),
         'currentLevel': session.get('level', 1),
         'strengths': strengths[:3],
@@ -1164,7 +1475,8 @@ def add_note_route():
 @app.route('/api/lectures', methods=['GET'])
 def get_lectures_route():
     """Get all available lectures"""
-    return jsonify(get_lectures())
+    # Lectures only change when the whole database is replaced, which starts a new epoch
+    return conditional_response(('lectures', data_epoch()), lambda: jsonify(get_lectures()))
 
 
 
@@ -1222,11 +1534,7 @@ def chat_with_ai():
     
     if not transcript:
         # Try finding the resource first to get its formal title
-        resource_match = None
-        for r in nlp_resources:
-            if r['id'] == module or r['title'].lower() == module_norm or r.get('module', '').lower() == module_norm:
-                resource_match = r
-                break
+        resource_match = catalog.get(module) or catalog.by_name(module_norm)
         
         target_name = resource_match['title'] if resource_match else module_norm
         target_name_lower = target_name.lower()
@@ -1238,10 +1546,9 @@ def chat_with_ai():
                 break
                 
     resource_desc = ''
-    for r in nlp_resources:
-        if r.get('module', '').lower() == module_norm or r.get('title', '').lower() == module_norm:
-            resource_desc = r.get('description', '')[:1000]
-            break
+    described = catalog.by_name(module_norm)
+    if described:
+        resource_desc = described.get('description', '')[:1000]
             
     context = transcript[:4500] if transcript else resource_desc[:1500]
     
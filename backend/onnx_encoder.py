@@ -0,0 +1,145 @@
+"""
+ONNX Runtime Sentence Encoder
+CPU inference path for the sentence-transformers model used to score
+summaries. The transformer is exported once to ONNX (optionally with
+dynamic int8 weight quantization) and run through onnxruntime; mean
+pooling and L2 normalization are done in NumPy, matching the
+SentenceTransformer pipeline (Transformer -> Pooling(mean) -> Normalize).
+
+Exporting needs torch and sentence-transformers; serving only needs
+onnxruntime and transformers (for the tokenizer). onnx and onnxruntime are
+optional dependencies, listed in requirements-onnx.txt.
+
+Layout:
+    <model dir>/model.onnx          fp32 export
+    <model dir>/model-int8.onnx     dynamically quantized weights
+    <model dir>/encoder.json        model name, max_seq_length, normalize
+    <model dir>/tokenizer files
+
+Usage:
+    python onnx_encoder.py export [--model all-MiniLM-L6-v2] [--dir data/cache/onnx] [--int8]
+"""
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+INPUT_NAMES = ('input_ids', 'attention_mask', 'token_type_ids')
+CONFIG_FILE = 'encoder.json'
+
+
+def model_path(model_dir, quantized=False):
+    return os.path.join(model_dir, 'model-int8.onnx' if quantized else 'model.onnx')
+
+
+def export(model_name, model_dir, quantize=False, opset=14):
+    """Export the SentenceTransformer's transformer to ONNX, then optionally quantize it to int8."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st_model = SentenceTransformer(model_name, device='cpu')
+    transformer = st_model[0].auto_model.eval()
+    tokenizer = st_model[0].tokenizer
+
+    class _LastHiddenState(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask,
+                              token_type_ids=token_type_ids).last_hidden_state
+
+    os.makedirs(model_dir, exist_ok=True)
+    sample = tokenizer(["export sample"], return_tensors='pt')
+    dynamic = {name: {0: 'batch', 1: 'sequence'} for name in INPUT_NAMES + ('last_hidden_state',)}
+    with torch.no_grad():
+        torch.onnx.export(_LastHiddenState(transformer), tuple(sample[name] for name in INPUT_NAMES),
+                          model_path(model_dir), input_names=list(INPUT_NAMES),
+                          output_names=['last_hidden_state'], dynamic_axes=dynamic, opset_version=opset)
+    tokenizer.save_pretrained(model_dir)
+    config = {
+        'model_name': model_name,
+        'max_seq_length': st_model.max_seq_length,
+        'normalize': any(type(module).__name__ == 'Normalize' for module in st_model),
+    }
+    with open(os.path.join(model_dir, CONFIG_FILE), 'w', encoding='utf-8') as f:
+        json.dump(config, f, indent=2)
+    print(f"[ONNX] Exported {model_name} to {model_path(model_dir)}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantize_dynamic(model_path(model_dir), model_path(model_dir, quantized=True), weight_type=QuantType.QInt8)
+        print(f"[ONNX] Quantized weights to int8: {model_path(model_dir, quantized=True)}")
+
+
+class OnnxEncoder:
+    """onnxruntime-backed stand-in for SentenceTransformer.encode (CPU only)."""
+
+    def __init__(self, model_dir, quantized=False, threads=None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        with open(os.path.join(model_dir, CONFIG_FILE), 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        self.model_name = config['model_name']
+        self.max_seq_length = config['max_seq_length']
+        self.normalize = config['normalize']
+        self.quantized = quantized
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(model_path(model_dir, quantized), options,
+                                            providers=['CPUExecutionProvider'])
+        self._inputs = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        """Embeddings as float32, (dim,) for one string or (n, dim) for a list."""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        batches = []
+        for start in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                                     max_length=self.max_seq_length, return_tensors='np')
+            feed = {name: encoded[name].astype(np.int64) for name in INPUT_NAMES if name in self._inputs}
+            hidden = self.session.run(None, feed)[0]
+            # Mean pooling over real (non-padding) tokens
+            mask = encoded['attention_mask'][..., None].astype(np.float32)
+            pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            if self.normalize:
+                pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            batches.append(pooled.astype(np.float32))
+        embeddings = np.vstack(batches) if batches else np.zeros((0, 0), dtype=np.float32)
+        return embeddings[0] if single else embeddings
+
+
+def load(model_name, model_dir, quantized=False, threads=None):
+    """OnnxEncoder for `model_name`, exporting (and quantizing) it first if needed."""
+    config_path = os.path.join(model_dir, CONFIG_FILE)
+    exported = None
+    if os.path.exists(config_path):
+        with open(config_path, 'r', encoding='utf-8') as f:
+            exported = json.load(f).get('model_name')
+    if exported != model_name or not os.path.exists(model_path(model_dir, quantized)):
+        export(model_name, model_dir, quantize=quantized)
+    return OnnxEncoder(model_dir, quantized=quantized, threads=threads)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export the sentence encoder to ONNX")
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('export', help='Export (and optionally int8-quantize) the model')
+    p.add_argument('--model', default='all-MiniLM-L6-v2')
+    p.add_argument('--dir', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'cache', 'onnx'))
+    p.add_argument('--int8', action='store_true', help='Also write dynamically quantized int8 weights')
+    args = parser.parse_args(argv)
+    export(args.model, args.dir, quantize=args.int8)
+
+
+if __name__ == '__main__':
+    main()
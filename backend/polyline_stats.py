@@ -0,0 +1,110 @@
+"""
+Running Polyline Statistics
+Per-module sum, count and max of the stored polylines' module_scores, and
+how often each keyword was found, updated on every polyline write. The
+"Current Average Knowledge" polyline, a learner's highline and the dominant
+topics are read from these instead of being rebuilt from the whole history
+on every request.
+
+Vectors of different lengths are treated as zero-padded, which matches how
+the endpoints averaged and max-reduced the raw histories.
+"""
+
+
+META_KEY = "polyline_stats"
+
+
+def empty_stats():
+    return {"count": 0, "sum": [], "max": [], "keywords": {}}
+
+
+def is_current(stats):
+    """False for missing stats and for ones stored before keyword counts were kept."""
+    return stats is not None and "keywords" in stats
+
+
+def scores_of(polyline):
+    """The module_scores that count towards the statistics, or None."""
+    if not isinstance(polyline, dict) or not polyline.get("module_scores"):
+        return None
+    return [float(s) for s in polyline["module_scores"]]
+
+
+def keywords_of(polyline):
+    """The keywords found for a polyline (empty when it has none)."""
+    if not isinstance(polyline, dict):
+        return []
+    return list(polyline.get("keywords_found") or [])
+
+
+def add_scores(stats, scores):
+    """Fold one score vector into `stats` in place."""
+    if stats["count"] == 0:
+        stats["sum"] = list(scores)
+        stats["max"] = list(scores)
+    else:
+        width = max(len(stats["sum"]), len(scores))
+        for key in ("sum", "max"):
+            stats[key].extend([0.0] * (width - len(stats[key])))
+        for i in range(width):
+            s = scores[i] if i < len(scores) else 0.0
+            stats["sum"][i] += s
+            if s > stats["max"][i]:
+                stats["max"][i] = s
+    stats["count"] += 1
+    return stats
+
+
+def add_polyline(stats, scores, keywords):
+    """Fold one polyline's score vector (may be None) and keywords into `stats` in place."""
+    if scores:
+        add_scores(stats, scores)
+    counts = stats.setdefault("keywords", {})
+    for keyword in keywords:
+        counts[keyword] = counts.get(keyword, 0) + 1
+    return stats
+
+
+def remove_stats(stats, removed):
+    """
+    Take the statistics of removed polylines (`removed`, e.g. from
+    build_stats) out of `stats` in place. Sums, count and keyword counts are
+    exact; a max cannot be decremented, so it stays an upper bound (only
+    per-session highlines read it, and those are rebuilt, not subtracted).
+    """
+    if removed["count"] >= stats["count"]:
+        kept = stats.get("keywords", {})
+        stats.update(empty_stats())
+    else:
+        for i, s in enumerate(removed["sum"][:len(stats["sum"])]):
+            stats["sum"][i] -= s
+        stats["count"] -= removed["count"]
+        kept = stats.setdefault("keywords", {})
+    for keyword, n in removed.get("keywords", {}).items():
+        left = kept.get(keyword, 0) - n
+        if left > 0:
+            kept[keyword] = left
+        else:
+            kept.pop(keyword, None)
+    stats["keywords"] = kept
+    return stats
+
+
+def build_stats(polylines):
+    """Statistics of an iterable of polyline records (full rebuild)."""
+    stats = empty_stats()
+    for polyline in polylines:
+        add_polyline(stats, scores_of(polyline), keywords_of(polyline))
+    return stats
+
+
+def average(stats, size, default=0.0):
+    """Per-module mean over `size` modules, or `default` everywhere when empty."""
+    if not stats["count"]:
+        return [default] * size
+    return [stats["sum"][i] / stats["count"] if i < len(stats["sum"]) else 0.0 for i in range(size)]
+
+
+def highline(stats, size):
+    """Per-module maximum over `size` modules (0.0 when empty)."""
+    return [stats["max"][i] if i < len(stats["max"]) else 0.0 for i in range(size)]
@@ -19,8 +19,11 @@ dimension, then A's 2D point will have x_A ≥ x_B and y_A ≥ y_B.
 """
 
 import math
+from functools import lru_cache
 from typing import Optional
 
+import numpy as np
+
 
 def _axis_length(b: int, theta: float, x_len: float, y_len: float) -> float:
     """
@@ -127,6 +130,83 @@ def polyline_to_2d(
     return (x_l, y_l)
 
 
+@lru_cache(maxsize=32)
+def _projection(num_topics: int, x_len: float, y_len: float) -> tuple:
+    """
+    Per-topic axis lengths, cosines and sines for polylines_to_2d_batch,
+    computed once per (num_topics, x_len, y_len) with the same math calls
+    as polyline_to_2d so both produce the same floats.
+    """
+    theta = (math.pi / 2) / (num_topics - 1)
+    lengths = np.array([_axis_length(b, theta, x_len, y_len) for b in range(num_topics)])
+    cos = np.array([math.cos(b * theta) for b in range(num_topics)])
+    sin = np.array([math.sin(b * theta) for b in range(num_topics)])
+    for a in (lengths, cos, sin):
+        a.setflags(write=False)
+    return lengths, cos, sin
+
+
+def polylines_to_2d_batch(
+    scores_matrix,
+    num_topics: Optional[int] = None,
+    x_len: float = 19.0,
+    y_len: float = 19.0,
+) -> np.ndarray:
+    """
+    Vectorised polyline_to_2d over many polylines at once.
+
+    Results are bit-for-bit those of polyline_to_2d on each row: the
+    per-topic terms are multiplied in the same order and summed topic by
+    topic (a matrix product or np.sum would round differently).
+
+    Parameters
+    ----------
+    scores_matrix : array-like, shape (N, T)
+        One row of module scores per polyline.
+    num_topics : int, optional
+        Number of topics.  Defaults to T; missing columns count as 0,
+        extra columns are ignored (as in polyline_to_2d).
+    x_len, y_len : float
+        As in polyline_to_2d.
+
+    Returns
+    -------
+    np.ndarray, shape (N, 2)
+        The (x_l, y_l) point of every polyline.
+    """
+    scores = np.asarray(scores_matrix, dtype=np.float64)
+    if scores.ndim != 2:
+        raise ValueError(f"scores_matrix must be 2-D (N x T), got shape {scores.shape}")
+    points = np.zeros((scores.shape[0], 2))
+    if scores.shape[1] == 0:
+        # Empty polylines map to the origin
+        return points
+
+    if num_topics is None:
+        num_topics = scores.shape[1]
+
+    # Clamp to [0, 1] like max(0.0, min(1.0, s)), which also maps NaN to 1.0
+    r = np.where(scores < 1.0, scores, 1.0)
+    r = np.where(r > 0.0, r, 0.0)
+
+    if num_topics <= 1:
+        points[:, 0] = r[:, 0] * x_len
+        return points
+
+    lengths, cos, sin = _projection(num_topics, float(x_len), float(y_len))
+    sum_x = np.zeros(scores.shape[0])
+    sum_y = np.zeros(scores.shape[0])
+    # Topics past the last column have r = 0 and add nothing
+    for b in range(min(num_topics, scores.shape[1])):
+        r_length = r[:, b] * lengths[b]
+        sum_x += r_length * cos[b]
+        sum_y += r_length * sin[b]
+
+    points[:, 0] = sum_x / num_topics
+    points[:, 1] = sum_y / num_topics
+    return points
+
+
 def map_to_grid(
     x_2d: float,
     y_2d: float,
@@ -0,0 +1,91 @@
+"""
+Database Serializers
+Encodes the db.json snapshot in one of several formats and decodes any of
+them, detecting the format from the file content:
+
+    json          indented JSON (default, human readable)
+    json-compact  JSON without whitespace, written with orjson when installed
+    msgpack       MessagePack; polyline module_scores are packed float32 arrays
+
+The file keeps its name whatever the format, so DB_PATH and the backup
+tooling do not change when DB_FORMAT does.
+"""
+
+import json
+import struct
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+FORMATS = ('json', 'json-compact', 'msgpack')
+
+# MessagePack extension type of a little-endian float32 array
+FLOAT32_ARRAY = 1
+
+
+def resolve_format(fmt):
+    """Validate a DB_FORMAT value, falling back when its library is missing."""
+    fmt = (fmt or 'json').strip().lower()
+    if fmt not in FORMATS:
+        print(f"[WARN] Unknown DB_FORMAT '{fmt}', falling back to json")
+        return 'json'
+    if fmt == 'msgpack' and msgpack is None:
+        print("[WARN] DB_FORMAT=msgpack needs the msgpack package, falling back to json-compact")
+        return 'json-compact'
+    return fmt
+
+
+def detect_format(data):
+    """'json' for anything that looks like a JSON document, otherwise 'msgpack'."""
+    return 'json' if data.lstrip()[:1] in (b'{', b'[') else 'msgpack'
+
+
+def _pack_float32(values):
+    return msgpack.ExtType(FLOAT32_ARRAY, struct.pack(f'<{len(values)}f', *values))
+
+
+def _ext_hook(code, data):
+    if code == FLOAT32_ARRAY:
+        return list(struct.unpack(f'<{len(data) // 4}f', data))
+    return msgpack.ExtType(code, data)
+
+
+def _pack_polylines(polylines):
+    packed = {}
+    for polyline_id, polyline in polylines.items():
+        scores = polyline.get('module_scores') if isinstance(polyline, dict) else None
+        if isinstance(scores, list) and scores and all(isinstance(s, (int, float)) for s in scores):
+            polyline = dict(polyline, module_scores=_pack_float32(scores))
+        packed[polyline_id] = polyline
+    return packed
+
+
+def dumps(db, fmt='json'):
+    """Serialize a database document; returns str for 'json', bytes otherwise."""
+    if fmt == 'msgpack':
+        doc = dict(db)
+        if isinstance(doc.get('polylines'), dict):
+            doc['polylines'] = _pack_polylines(doc['polylines'])
+        return msgpack.packb(doc, use_bin_type=True)
+    if fmt == 'json-compact':
+        if orjson is not None:
+            return orjson.dumps(db)
+        return json.dumps(db, separators=(',', ':')).encode('utf-8')
+    return json.dumps(db, indent=4)
+
+
+def loads(data):
+    """Parse a serialized document (bytes) in any supported format."""
+    if detect_format(data) == 'json':
+        return orjson.loads(data) if orjson is not None else json.loads(data)
+    if msgpack is None:
+        # Not a ValueError: callers treat those as a corrupt file and start over
+        raise RuntimeError("Database file is MessagePack encoded but the msgpack package is not installed")
+    return msgpack.unpackb(data, raw=False, ext_hook=_ext_hook, strict_map_key=False)
@@ -0,0 +1,59 @@
+"""
+Cold Session Archive
+Sessions that have been idle for a while are moved out of the hot database
+into one gzip-compressed JSON file each, and are restored the next time
+the learner shows up. The hot store then only holds active learners.
+
+Layout:
+    <root>/<quoted session id>.json.gz
+"""
+
+import gzip
+import json
+import os
+from urllib.parse import quote, unquote
+
+try:
+    from .db_io import atomic_write
+except ImportError:
+    from db_io import atomic_write
+
+SUFFIX = '.json.gz'
+
+
+def archive_path(root, session_id):
+    return os.path.join(root, quote(str(session_id), safe='') + SUFFIX)
+
+
+def has_archive(root, session_id):
+    return os.path.exists(archive_path(root, session_id))
+
+
+def write_archive(root, session_id, bundle, fsync=True):
+    """Store a session bundle (session, polylines, summaries, bookmarks, notes)."""
+    data = gzip.compress(json.dumps(bundle, separators=(',', ':')).encode('utf-8'))
+    atomic_write(archive_path(root, session_id), data, fsync=fsync)
+
+
+def read_archive(root, session_id):
+    """Return the archived bundle of a session, or None."""
+    try:
+        with gzip.open(archive_path(root, session_id), 'rb') as f:
+            return json.loads(f.read())
+    except FileNotFoundError:
+        return None
+
+
+def remove_archive(root, session_id):
+    try:
+        os.remove(archive_path(root, session_id))
+    except FileNotFoundError:
+        pass
+
+
+def archived_sessions(root):
+    """(session id, compressed size in bytes) of every archived session."""
+    if not os.path.isdir(root):
+        return []
+    return [(unquote(name[:-len(SUFFIX)]), os.path.getsize(os.path.join(root, name)))
+            for name in sorted(os.listdir(root)) if name.endswith(SUFFIX)]
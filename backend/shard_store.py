@@ -0,0 +1,421 @@
+"""
+Sharded Storage Engine
+Keeps each learner's state, notes, bookmarks, summaries and polylines in a
+shard file of its own, plus a small manifest for cross-session data
+(users, lectures). A write only reads and rewrites the shard it touches,
+so its cost does not depend on how many learners exist, and writes to
+different sessions do not wait for each other.
+
+Layout:
+    <root>/manifest.json
+    <root>/global.json                      (derived cross-session data)
+    <root>/sessions/<quoted session id>.json
+
+Enable with DB_ENGINE=sharded. Use `python backend/db_admin.py import-shards`
+to split an existing db.json into shards.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from urllib.parse import quote, unquote
+
+try:
+    from .db_io import FileLock, atomic_write
+    from .json_store import JSONStore, infer_polyline_sessions, summary_session_id, stamp_change, trim_change_log, scope_changes
+    from . import polyline_stats
+except ImportError:
+    from db_io import FileLock, atomic_write
+    from json_store import JSONStore, infer_polyline_sessions, summary_session_id, stamp_change, trim_change_log, scope_changes
+    import polyline_stats
+
+
+def empty_shard(session_id):
+    return {
+        "session_id": session_id,
+        "session": None,
+        "polylines": {},
+        "polyline_created": {},  # polyline_id -> creation time (ns), orders the global history
+        "summaries": [],
+        "bookmarks": None,
+        "notes": [],
+        "meta": {},
+    }
+
+
+def empty_manifest():
+    return {"users": [], "lectures": []}
+
+
+class ShardedStore:
+    """Storage engine with one JSON shard per session."""
+
+    name = "sharded"
+
+    def __init__(self, root, fsync=True, change_log_size=500):
+        self.root = root
+        self.sessions_dir = os.path.join(root, 'sessions')
+        self.manifest_path = os.path.join(root, 'manifest.json')
+        self.global_path = os.path.join(root, 'global.json')
+        self.fsync = fsync
+        self.change_log_size = change_log_size
+        self._locks = {}
+        self._locks_guard = threading.Lock()
+        self._manifest_lock = FileLock(self.manifest_path)
+        self._local = threading.local()
+
+    # ---------- paths and locks ----------
+
+    def _shard_path(self, session_id):
+        if session_id is None:
+            return self.global_path
+        return os.path.join(self.sessions_dir, quote(str(session_id), safe='') + '.json')
+
+    def _shard_lock(self, session_id):
+        """Cross-process lock of one shard (also excludes other threads of this process)."""
+        with self._locks_guard:
+            lock = self._locks.get(session_id)
+            if lock is None:
+                lock = self._locks[session_id] = FileLock(self._shard_path(session_id))
+            return lock
+
+    def session_ids(self):
+        if not os.path.isdir(self.sessions_dir):
+            return []
+        return [unquote(name[:-5]) for name in sorted(os.listdir(self.sessions_dir))
+                if name.endswith('.json')]
+
+    # ---------- shard I/O ----------
+
+    def _read_json(self, path, default):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return default
+
+    def _write_json(self, path, data):
+        atomic_write(path, json.dumps(data), fsync=self.fsync)
+
+    def _peek_shard(self, session_id):
+        """Read a shard without locking it (the caller's pending edits win)."""
+        tx = getattr(self._local, "shards", None)
+        if tx is not None and session_id in tx:
+            return tx[session_id]
+        return self._read_json(self._shard_path(session_id), None) or empty_shard(session_id)
+
+    def _load_shard(self, session_id):
+        """Read a shard; inside a transaction the shard stays locked until it ends."""
+        tx = getattr(self._local, "shards", None)
+        if tx is None:
+            return self._peek_shard(session_id)
+        if session_id not in tx:
+            self._shard_lock(session_id).acquire()
+            self._local.locked.append(session_id)
+            tx[session_id] = self._peek_shard(session_id)
+        return tx[session_id]
+
+    @contextmanager
+    def _editing(self, session_id):
+        """Load one shard for modification and write it back on exit."""
+        with self.transaction():
+            shard = self._load_shard(session_id)
+            yield shard
+            self._local.dirty.add(session_id)
+            self._local.deleted.discard(session_id)
+
+    @contextmanager
+    def transaction(self):
+        """Buffer shard edits and write every touched shard once at the end."""
+        if getattr(self._local, "shards", None) is not None:
+            yield
+            return
+        self._local.shards = {}
+        self._local.dirty = set()
+        self._local.deleted = set()
+        self._local.locked = []
+        try:
+            yield
+            for session_id in self._local.dirty:
+                self._write_json(self._shard_path(session_id), self._local.shards[session_id])
+            for session_id in self._local.deleted:
+                if os.path.exists(self._shard_path(session_id)):
+                    os.remove(self._shard_path(session_id))
+        finally:
+            for session_id in self._local.locked:
+                self._shard_lock(session_id).release()
+            self._local.shards = None
+
+    # ---------- file level ----------
+
+    def init(self):
+        os.makedirs(self.sessions_dir, exist_ok=True)
+        with self._manifest_lock:
+            if not os.path.exists(self.manifest_path):
+                self._write_json(self.manifest_path, empty_manifest())
+
+    def reset(self):
+        for session_id in self.session_ids():
+            with self._shard_lock(session_id):
+                if os.path.exists(self._shard_path(session_id)):
+                    os.remove(self._shard_path(session_id))
+        with self._shard_lock(None):
+            if os.path.exists(self.global_path):
+                os.remove(self.global_path)
+        with self._manifest_lock:
+            self._write_json(self.manifest_path, empty_manifest())
+
+    def _manifest(self):
+        return self._read_json(self.manifest_path, None) or empty_manifest()
+
+    def load_all(self):
+        """Materialise every shard in the db.json document layout."""
+        manifest = self._manifest()
+        db = {
+            "users": manifest.get("users", []),
+            "learning_sessions": {},
+            "polylines": self.get_polylines(),
+            "summaries": self.get_summaries(),
+            "bookmarks": {},
+            "notes": {},
+            "lectures": manifest.get("lectures", []),
+            "polyline_sessions": {},
+            "summary_sessions": {},
+        }
+        for session_id in self.session_ids():
+            shard = self._peek_shard(session_id)
+            db["polyline_sessions"].update((polyline_id, session_id) for polyline_id in shard["polylines"])
+            db["summary_sessions"].update((s.get("id", ""), session_id) for s in shard["summaries"])
+            if shard["session"] is not None:
+                db["learning_sessions"][session_id] = shard["session"]
+            if shard["bookmarks"] is not None:
+                db["bookmarks"][session_id] = shard["bookmarks"]
+            if shard["notes"]:
+                db["notes"][session_id] = shard["notes"]
+        return db
+
+    def save_all(self, db):
+        """Replace every shard with the content of a db.json style document."""
+        owners = infer_polyline_sessions(db)
+        shards = {}
+
+        def shard_for(session_id):
+            if session_id not in shards:
+                shards[session_id] = empty_shard(session_id)
+            return shards[session_id]
+
+        for session_id, session in db.get("learning_sessions", {}).items():
+            shard_for(session_id)["session"] = session
+        base = time.time_ns()
+        for i, (polyline_id, polyline) in enumerate(db.get("polylines", {}).items()):
+            shard = shard_for(owners[polyline_id])
+            shard["polylines"][polyline_id] = polyline
+            shard["polyline_created"][polyline_id] = base + i
+        summary_owners = db.get("summary_sessions", {})
+        for summary in db.get("summaries", []):
+            shard_for(summary_session_id(summary, summary_owners))["summaries"].append(summary)
+        for session_id, ids in db.get("bookmarks", {}).items():
+            shard_for(session_id)["bookmarks"] = list(ids)
+        notes = db.get("notes", {})
+        if isinstance(notes, dict):
+            for session_id, items in notes.items():
+                shard_for(session_id)["notes"] = list(items)
+
+        self.reset()
+        os.makedirs(self.sessions_dir, exist_ok=True)
+        for session_id, shard in shards.items():
+            with self._shard_lock(session_id):
+                self._write_json(self._shard_path(session_id), shard)
+        with self._manifest_lock:
+            self._write_json(self.manifest_path, {"users": db.get("users", []), "lectures": db.get("lectures", [])})
+
+    # ---------- sessions ----------
+
+    def get_session(self, session_id):
+        return self._load_shard(session_id)["session"]
+
+    def put_session(self, session_id, data):
+        with self._editing(session_id) as shard:
+            shard["session"] = data
+
+    # ---------- polylines ----------
+
+    def get_polylines(self, session_id=None):
+        if session_id is not None:
+            shard = self._peek_shard(session_id)
+            created = shard.get("polyline_created", {})
+            return dict(sorted(shard["polylines"].items(), key=lambda item: created.get(item[0], 0)))
+        entries = []
+        for session_id in self.session_ids():
+            shard = self._peek_shard(session_id)
+            created = shard.get("polyline_created", {})
+            for polyline_id, polyline in shard["polylines"].items():
+                entries.append((created.get(polyline_id, 0), polyline_id, polyline))
+        entries.sort(key=lambda e: e[0])
+        return {polyline_id: polyline for _, polyline_id, polyline in entries}
+
+    def _find_polyline_owner(self, polyline_id):
+        for session_id in self.session_ids():
+            if polyline_id in self._peek_shard(session_id)["polylines"]:
+                return session_id
+        return None
+
+    def find_polyline(self, polyline_id, session_id=None):
+        if session_id is None:
+            session_id = self._find_polyline_owner(polyline_id)
+            if session_id is None:
+                return None, None
+        polyline = self._load_shard(session_id)["polylines"].get(polyline_id)
+        return (session_id, polyline) if polyline is not None else (None, None)
+
+    def put_polyline(self, polyline_id, data, session_id=None):
+        if session_id is None:
+            # Updates of an existing polyline (e.g. visibility toggles) keep their owner
+            session_id = self._find_polyline_owner(polyline_id) or "default"
+        with self._editing(session_id) as shard:
+            if polyline_id not in shard["polylines"]:
+                shard.setdefault("polyline_created", {})[polyline_id] = time.time_ns()
+            shard["polylines"][polyline_id] = data
+
+    def delete_session_polylines(self, session_id):
+        """Remove the session's polylines; returns the removed {id: record}."""
+        with self._editing(session_id) as shard:
+            removed = shard["polylines"]
+            shard["polylines"] = {}
+            shard["polyline_created"] = {}
+        return removed
+
+    # ---------- summaries ----------
+
+    def get_summaries(self, session_id=None, since=None):
+        if session_id is not None:
+            summaries = list(self._peek_shard(session_id)["summaries"])
+        else:
+            summaries = []
+            for sid in self.session_ids():
+                summaries.extend(self._peek_shard(sid)["summaries"])
+            summaries.sort(key=lambda s: s.get("timestamp") or 0)
+        if since is not None:
+            summaries = [s for s in summaries if (s.get("timestamp") or 0) > since]
+        return summaries
+
+    def add_summary(self, data, session_id=None):
+        if session_id is None:
+            session_id = summary_session_id(data)
+        with self._editing(session_id) as shard:
+            shard["summaries"].append(data)
+
+    def update_summaries(self, records):
+        """Replace stored summaries by id ({summary_id: data}); owners and order are kept."""
+        if not records:
+            return
+        with self.transaction():
+            for session_id in self.session_ids():
+                if any(s.get("id", "") in records for s in self._peek_shard(session_id)["summaries"]):
+                    with self._editing(session_id) as shard:
+                        shard["summaries"] = [records.get(s.get("id", ""), s) for s in shard["summaries"]]
+
+    def delete_session_summaries(self, session_id):
+        with self._editing(session_id) as shard:
+            shard["summaries"] = []
+
+    # ---------- bookmarks / notes / lectures ----------
+
+    def get_bookmarks(self, session_id):
+        return self._load_shard(session_id)["bookmarks"]
+
+    def set_bookmarks(self, session_id, resource_ids):
+        with self._editing(session_id) as shard:
+            shard["bookmarks"] = list(resource_ids)
+
+    def get_notes(self, session_id):
+        return self._load_shard(session_id)["notes"]
+
+    def add_note(self, session_id, note_data):
+        with self._editing(session_id) as shard:
+            shard["notes"].append(note_data)
+
+    def get_lectures(self):
+        return self._manifest().get("lectures", [])
+
+    # ---------- retention ----------
+
+    def delete_session(self, session_id):
+        """Remove the session's shard (when the transaction ends)."""
+        with self.transaction():
+            self._load_shard(session_id)
+            self._local.shards[session_id] = empty_shard(session_id)
+            self._local.dirty.discard(session_id)
+            self._local.deleted.add(session_id)
+
+    def disk_usage(self):
+        total = 0
+        for directory, _, files in os.walk(self.root):
+            total += sum(os.path.getsize(os.path.join(directory, name)) for name in files)
+        return total
+
+    # ---------- derived data ----------
+
+    # Cross-session values live in global.json (shard id None). Transactions
+    # lock session shards before it, so the lock order is always the same.
+
+    def get_meta(self, key, session_id=None):
+        return self._load_shard(session_id).get("meta", {}).get(key)
+
+    def put_meta(self, key, value, session_id=None):
+        with self._editing(session_id) as shard:
+            shard.setdefault("meta", {})[key] = value
+
+    def add_polyline_stats(self, scores, keywords, session_id=None):
+        """Fold one polyline into the scope's running stats (left unset if they are)."""
+        with self.transaction():
+            stats = self._load_shard(session_id).get("meta", {}).get(polyline_stats.META_KEY)
+            if polyline_stats.is_current(stats):
+                with self._editing(session_id):
+                    polyline_stats.add_polyline(stats, scores, keywords)
+
+
+    # ---------- versions / change log ----------
+
+    # Kept in the shard's meta, in the layout of json_store.stamp_change
+
+    def get_version(self, session_id=None):
+        """Version of the last logged write to a scope (0 before the first)."""
+        return self._load_shard(session_id).get("meta", {}).get("data_version") or 0
+
+    def polyline_versions(self):
+        """{scope: version of its last polyline write} of every scope with one."""
+        versions = {}
+        for session_id in self.session_ids() + [None]:
+            version = self._peek_shard(session_id).get("meta", {}).get("polylines_version")
+            if version:
+                versions[session_id] = version
+        return versions
+
+    def log_change(self, seq, entries, polylines=False, session_id=None):
+        """Stamp `seq` on a scope and log its (kind, id) entries in the shard being written anyway."""
+        with self._editing(session_id) as shard:
+            scope = shard.setdefault("meta", {})
+            stamp_change(scope, seq, entries, polylines)
+            if len(scope["change_log"]["entries"]) > 2 * self.change_log_size:
+                trim_change_log(scope, self.change_log_size)
+
+    def changes_since(self, since, session_ids=None):
+        """([seq, kind, id] entries after `since`, complete) of the given scopes (None: every scope)."""
+        if session_ids is None:
+            session_ids = self.session_ids() + [None]
+        return scope_changes([self._peek_shard(sid).get("meta", {}) for sid in session_ids], since)
+
+
+def import_json_db(json_path, shard_root):
+    """One-shot split of an existing db.json file into per-session shards."""
+    db = JSONStore(json_path).load_all()
+    store = ShardedStore(shard_root)
+    store.save_all(db)
+    return {
+        "shards": len(store.session_ids()),
+        "polylines": len(db.get("polylines", {})),
+        "summaries": len(db.get("summaries", [])),
+    }
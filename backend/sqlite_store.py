@@ -0,0 +1,426 @@
+"""
+SQLite Storage Engine
+Stores sessions, polylines, summaries, bookmarks and notes in their own
+tables so that a single write only touches the affected rows.
+
+Enable with DB_ENGINE=sqlite. Use `python backend/db_admin.py import-sqlite`
+to load an existing db.json into the SQLite database.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    from .json_store import JSONStore, infer_polyline_sessions, summary_session_id, polyline_timestamp
+    from . import polyline_stats
+except ImportError:
+    from json_store import JSONStore, infer_polyline_sessions, summary_session_id, polyline_timestamp
+    import polyline_stats
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id  TEXT PRIMARY KEY,
+    data        TEXT NOT NULL,
+    updated_at  INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS polylines (
+    polyline_id TEXT PRIMARY KEY,
+    session_id  TEXT,
+    data        TEXT NOT NULL,
+    timestamp   INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_polylines_session ON polylines(session_id);
+CREATE INDEX IF NOT EXISTS idx_polylines_timestamp ON polylines(timestamp);
+CREATE TABLE IF NOT EXISTS summaries (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    summary_id  TEXT NOT NULL,
+    session_id  TEXT,
+    data        TEXT NOT NULL,
+    timestamp   INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_summaries_session ON summaries(session_id);
+CREATE INDEX IF NOT EXISTS idx_summaries_timestamp ON summaries(timestamp);
+CREATE TABLE IF NOT EXISTS bookmarks (
+    session_id  TEXT NOT NULL,
+    resource_id TEXT NOT NULL,
+    position    INTEGER NOT NULL,
+    PRIMARY KEY (session_id, resource_id)
+);
+CREATE TABLE IF NOT EXISTS notes (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id  TEXT NOT NULL,
+    data        TEXT NOT NULL,
+    timestamp   INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_notes_session ON notes(session_id);
+CREATE INDEX IF NOT EXISTS idx_notes_timestamp ON notes(timestamp);
+CREATE TABLE IF NOT EXISTS documents (
+    key         TEXT PRIMARY KEY,
+    data        TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    scope       TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    data        TEXT NOT NULL,
+    PRIMARY KEY (scope, key)
+);
+CREATE TABLE IF NOT EXISTS versions (
+    scope             TEXT PRIMARY KEY,
+    data_version      INTEGER NOT NULL,
+    polylines_version INTEGER,
+    log_floor         INTEGER NOT NULL DEFAULT 0,
+    log_count         INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS change_log (
+    scope       TEXT NOT NULL,
+    seq         INTEGER NOT NULL,
+    kind        TEXT NOT NULL,
+    key         TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_change_log_scope ON change_log(scope, seq);
+CREATE INDEX IF NOT EXISTS idx_change_log_seq ON change_log(seq);
+"""
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+class SQLiteStore:
+    """Row-level storage engine backed by SQLite in WAL mode."""
+
+    name = "sqlite"
+
+    def __init__(self, path, change_log_size=500):
+        self.path = path
+        self.change_log_size = change_log_size
+        self._local = threading.local()
+
+    # ---------- connection handling ----------
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            # Autocommit mode: transactions are opened explicitly below
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+            self._local.depth = 0
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        """Run the enclosed mutations inside one write transaction."""
+        conn = self._conn()
+        if self._local.depth:
+            self._local.depth += 1
+            try:
+                yield
+            finally:
+                self._local.depth -= 1
+            return
+        conn.execute("BEGIN IMMEDIATE")
+        self._local.depth = 1
+        try:
+            yield
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+        finally:
+            self._local.depth = 0
+
+    def _execute(self, sql, params=()):
+        with self.transaction():
+            return self._conn().execute(sql, params)
+
+    def _query(self, sql, params=()):
+        return self._conn().execute(sql, params).fetchall()
+
+    # ---------- file level ----------
+
+    def init(self):
+        self._conn()
+
+    def reset(self):
+        with self.transaction():
+            conn = self._conn()
+            for table in ("sessions", "polylines", "summaries", "bookmarks", "notes", "documents", "meta",
+                          "versions", "change_log"):
+                conn.execute(f"DELETE FROM {table}")
+
+    def load_all(self):
+        """Materialise the whole database in the db.json document layout."""
+        db = {
+            "users": self._get_document("users", []),
+            "learning_sessions": {
+                sid: json.loads(data)
+                for sid, data in self._query("SELECT session_id, data FROM sessions ORDER BY rowid")
+            },
+            "polylines": self.get_polylines(),
+            "summaries": self.get_summaries(),
+            "bookmarks": {},
+            "notes": {},
+            "lectures": self.get_lectures(),
+            "polyline_sessions": {
+                pid: sid for pid, sid in self._query("SELECT polyline_id, session_id FROM polylines WHERE session_id IS NOT NULL")
+            },
+            "summary_sessions": {
+                summary_id: sid for summary_id, sid in self._query("SELECT summary_id, session_id FROM summaries ORDER BY id")
+            },
+        }
+        for sid, rid in self._query("SELECT session_id, resource_id FROM bookmarks ORDER BY session_id, position"):
+            db["bookmarks"].setdefault(sid, []).append(rid)
+        for sid, data in self._query("SELECT session_id, data FROM notes ORDER BY id"):
+            db["notes"].setdefault(sid, []).append(json.loads(data))
+        return db
+
+    def save_all(self, db):
+        """Replace the whole database with a db.json style document."""
+        owners = infer_polyline_sessions(db)
+        summary_owners = db.get("summary_sessions", {})
+        with self.transaction():
+            self.reset()
+            conn = self._conn()
+            now = _now_ms()
+            conn.executemany(
+                "INSERT INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?)",
+                [(sid, json.dumps(s), now) for sid, s in db.get("learning_sessions", {}).items()])
+            conn.executemany(
+                "INSERT INTO polylines (polyline_id, session_id, data, timestamp) VALUES (?, ?, ?, ?)",
+                [(pid, owners.get(pid), json.dumps(p), polyline_timestamp(pid, p, now))
+                 for pid, p in db.get("polylines", {}).items()])
+            conn.executemany(
+                "INSERT INTO summaries (summary_id, session_id, data, timestamp) VALUES (?, ?, ?, ?)",
+                [(s.get("id", ""), summary_session_id(s, summary_owners), json.dumps(s),
+                  s.get("timestamp") or now) for s in db.get("summaries", [])])
+            for sid, ids in db.get("bookmarks", {}).items():
+                self.set_bookmarks(sid, ids)
+            notes = db.get("notes", {})
+            if isinstance(notes, dict):
+                for sid, items in notes.items():
+                    for note in items:
+                        self.add_note(sid, note)
+            self._put_document("users", db.get("users", []))
+            self._put_document("lectures", db.get("lectures", []))
+
+    def _get_document(self, key, default):
+        rows = self._query("SELECT data FROM documents WHERE key = ?", (key,))
+        return json.loads(rows[0][0]) if rows else default
+
+    def _put_document(self, key, value):
+        self._execute("INSERT INTO documents (key, data) VALUES (?, ?) "
+                      "ON CONFLICT(key) DO UPDATE SET data = excluded.data", (key, json.dumps(value)))
+
+    # ---------- sessions ----------
+
+    def get_session(self, session_id):
+        rows = self._query("SELECT data FROM sessions WHERE session_id = ?", (session_id,))
+        return json.loads(rows[0][0]) if rows else None
+
+    def put_session(self, session_id, data):
+        self._execute("INSERT INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?) "
+                      "ON CONFLICT(session_id) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at",
+                      (session_id, json.dumps(data), _now_ms()))
+
+    # ---------- polylines ----------
+
+    def get_polylines(self, session_id=None):
+        if session_id is None:
+            rows = self._query("SELECT polyline_id, data FROM polylines ORDER BY rowid")
+        else:
+            rows = self._query("SELECT polyline_id, data FROM polylines WHERE session_id = ? ORDER BY rowid",
+                               (session_id,))
+        return {pid: json.loads(data) for pid, data in rows}
+
+    def find_polyline(self, polyline_id, session_id=None):
+        rows = self._query("SELECT session_id, data FROM polylines WHERE polyline_id = ?", (polyline_id,))
+        return (rows[0][0], json.loads(rows[0][1])) if rows else (None, None)
+
+    def put_polyline(self, polyline_id, data, session_id=None):
+        # Updating an existing polyline keeps its owner and its position in the history
+        self._execute("INSERT INTO polylines (polyline_id, session_id, data, timestamp) VALUES (?, ?, ?, ?) "
+                      "ON CONFLICT(polyline_id) DO UPDATE SET data = excluded.data, "
+                      "session_id = COALESCE(excluded.session_id, polylines.session_id)",
+                      (polyline_id, session_id, json.dumps(data), polyline_timestamp(polyline_id, data, _now_ms())))
+
+    def delete_session_polylines(self, session_id):
+        """Remove the session's polylines (and a stored average); returns the removed {id: record}."""
+        where = "WHERE session_id = ? OR polyline_id = 'current_average'"
+        with self.transaction():
+            removed = {pid: json.loads(data)
+                       for pid, data in self._query(f"SELECT polyline_id, data FROM polylines {where}", (session_id,))}
+            self._execute(f"DELETE FROM polylines {where}", (session_id,))
+        return removed
+
+    # ---------- summaries ----------
+
+    def get_summaries(self, session_id=None, since=None):
+        clauses, params = [], []
+        if session_id is not None:
+            clauses.append("session_id = ?")
+            params.append(session_id)
+        if since is not None:
+            clauses.append("timestamp > ?")
+            params.append(since)
+        where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+        return [json.loads(data) for (data,) in self._query(f"SELECT data FROM summaries{where} ORDER BY id", params)]
+
+    def add_summary(self, data, session_id=None):
+        summary_id = data.get("id", "")
+        if session_id is None:
+            session_id = summary_session_id(data)
+        self._execute("INSERT INTO summaries (summary_id, session_id, data, timestamp) VALUES (?, ?, ?, ?)",
+                      (summary_id, session_id, json.dumps(data), data.get("timestamp") or _now_ms()))
+
+    def update_summaries(self, records):
+        """Replace stored summaries by id ({summary_id: data}); owners and order are kept."""
+        with self.transaction():
+            for summary_id, data in records.items():
+                self._execute("UPDATE summaries SET data = ? WHERE summary_id = ?", (json.dumps(data), summary_id))
+
+    def delete_session_summaries(self, session_id):
+        self._execute("DELETE FROM summaries WHERE session_id = ?", (session_id,))
+
+    # ---------- bookmarks / notes / lectures ----------
+
+    def get_bookmarks(self, session_id):
+        """Bookmarked resource ids, or None for a session that is not stored (e.g. archived)."""
+        rows = self._query("SELECT resource_id FROM bookmarks WHERE session_id = ? ORDER BY position", (session_id,))
+        if not rows and not self._query("SELECT 1 FROM sessions WHERE session_id = ?", (session_id,)):
+            return None
+        return [rid for (rid,) in rows]
+
+    def set_bookmarks(self, session_id, resource_ids):
+        with self.transaction():
+            conn = self._conn()
+            conn.execute("DELETE FROM bookmarks WHERE session_id = ?", (session_id,))
+            conn.executemany("INSERT OR IGNORE INTO bookmarks (session_id, resource_id, position) VALUES (?, ?, ?)",
+                             [(session_id, rid, i) for i, rid in enumerate(resource_ids)])
+
+    def get_notes(self, session_id):
+        rows = self._query("SELECT data FROM notes WHERE session_id = ? ORDER BY id", (session_id,))
+        return [json.loads(data) for (data,) in rows]
+
+    def add_note(self, session_id, note_data):
+        self._execute("INSERT INTO notes (session_id, data, timestamp) VALUES (?, ?, ?)",
+                      (session_id, json.dumps(note_data), _now_ms()))
+
+    def get_lectures(self):
+        return self._get_document("lectures", [])
+
+    # ---------- derived data ----------
+
+    # Cross-session values use the empty scope
+
+    def get_meta(self, key, session_id=None):
+        rows = self._query("SELECT data FROM meta WHERE scope = ? AND key = ?", (session_id or "", key))
+        return json.loads(rows[0][0]) if rows else None
+
+    def put_meta(self, key, value, session_id=None):
+        self._execute("INSERT INTO meta (scope, key, data) VALUES (?, ?, ?) "
+                      "ON CONFLICT(scope, key) DO UPDATE SET data = excluded.data",
+                      (session_id or "", key, json.dumps(value)))
+
+    def add_polyline_stats(self, scores, keywords, session_id=None):
+        """Fold one polyline into the scope's running stats row (left unset if it is)."""
+        with self.transaction():
+            stats = self.get_meta(polyline_stats.META_KEY, session_id=session_id)
+            if polyline_stats.is_current(stats):
+                self.put_meta(polyline_stats.META_KEY, polyline_stats.add_polyline(stats, scores, keywords),
+                              session_id=session_id)
+
+    # ---------- versions / change log ----------
+
+    def get_version(self, session_id=None):
+        """Version of the last logged write to a scope (0 before the first)."""
+        rows = self._query("SELECT data_version FROM versions WHERE scope = ?", (session_id or "",))
+        return rows[0][0] if rows else 0
+
+    def polyline_versions(self):
+        """{scope: version of its last polyline write} of every scope with one."""
+        return {scope or None: version for scope, version in
+                self._query("SELECT scope, polylines_version FROM versions WHERE polylines_version IS NOT NULL")}
+
+    def log_change(self, seq, entries, polylines=False, session_id=None):
+        """Stamp `seq` on a scope and append its (kind, id) entries as change_log rows."""
+        scope = session_id or ""
+        with self.transaction():
+            conn = self._conn()
+            conn.executemany("INSERT INTO change_log (scope, seq, kind, key) VALUES (?, ?, ?, ?)",
+                             [(scope, seq, kind, key) for kind, key in entries])
+            conn.execute("INSERT INTO versions (scope, data_version, polylines_version, log_count) VALUES (?, ?, ?, ?) "
+                         "ON CONFLICT(scope) DO UPDATE SET data_version = excluded.data_version, "
+                         "polylines_version = COALESCE(excluded.polylines_version, versions.polylines_version), "
+                         "log_count = versions.log_count + excluded.log_count",
+                         (scope, seq, seq if polylines else None, len(entries)))
+            (count,) = conn.execute("SELECT log_count FROM versions WHERE scope = ?", (scope,)).fetchone()
+            if count > 2 * self.change_log_size:
+                self._trim_change_log(scope)
+
+    def _trim_change_log(self, scope):
+        """Keep the newest change_log_size entries of a scope (whole seqs are dropped)."""
+        conn = self._conn()
+        row = conn.execute("SELECT seq FROM change_log WHERE scope = ? ORDER BY seq DESC LIMIT 1 OFFSET ?",
+                           (scope, self.change_log_size)).fetchone()
+        if row is None:
+            return
+        conn.execute("DELETE FROM change_log WHERE scope = ? AND seq <= ?", (scope, row[0]))
+        conn.execute("UPDATE versions SET log_floor = MAX(log_floor, ?), "
+                     "log_count = (SELECT COUNT(*) FROM change_log WHERE scope = ?) WHERE scope = ?",
+                     (row[0], scope, scope))
+
+    def changes_since(self, since, session_ids=None):
+        """([seq, kind, id] entries after `since`, complete) of the given scopes (None: every scope)."""
+        where, params = "", []
+        if session_ids is not None:
+            where = f" AND scope IN ({', '.join('?' * len(session_ids))})"
+            params = [sid or "" for sid in session_ids]
+        rows = self._query(f"SELECT seq, kind, key FROM change_log WHERE seq > ?{where} ORDER BY seq, rowid",
+                           [since] + params)
+        # Floors only grow: read after the rows, a trim racing this call makes the answer incomplete, never wrong
+        (floor,) = self._query(f"SELECT MAX(log_floor) FROM versions WHERE data_version > ?{where}",
+                               [since] + params)[0]
+        if floor is not None and floor > since:
+            return [], False
+        return [list(row) for row in rows], True
+
+    # ---------- retention ----------
+
+    def session_ids(self):
+        return [sid for (sid,) in self._query("SELECT session_id FROM sessions ORDER BY rowid")]
+
+    def delete_session(self, session_id):
+        """Remove everything stored for one session."""
+        with self.transaction():
+            conn = self._conn()
+            for table in ("sessions", "polylines", "summaries", "bookmarks", "notes"):
+                conn.execute(f"DELETE FROM {table} WHERE session_id = ?", (session_id,))
+            for table in ("meta", "versions", "change_log"):
+                conn.execute(f"DELETE FROM {table} WHERE scope = ?", (session_id,))
+
+    def disk_usage(self):
+        return sum(os.path.getsize(p) for p in (self.path, self.path + '-wal') if os.path.exists(p))
+
+
+def import_json_db(json_path, sqlite_path):
+    """One-shot import of an existing db.json file into a SQLite database."""
+    db = JSONStore(json_path).load_all()
+    store = SQLiteStore(sqlite_path)
+    store.save_all(db)
+    return {
+        "sessions": len(db.get("learning_sessions", {})),
+        "polylines": len(db.get("polylines", {})),
+        "summaries": len(db.get("summaries", [])),
+        "bookmarks": sum(len(v) for v in db.get("bookmarks", {}).values()),
+        "notes": sum(len(v) for v in db.get("notes", {}).values()) if isinstance(db.get("notes"), dict) else 0,
+    }
@@ -0,0 +1,149 @@
+"""
+Summary Embedding Cache
+Remembers the embedding of every cleaned summary text (or summary chunk)
+so resubmitted and retried summaries skip the encoder. Keys are the
+SHA-256 of the model id and the cleaned text, so switching models or
+backends never returns stale vectors.
+
+Two tiers:
+    memory  per-process LRU of `memory_items` vectors
+    disk    optional SQLite file (WAL) shared by every gunicorn worker,
+            trimmed to `disk_max_mb` by evicting least recently used rows
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS embeddings (
+    key         TEXT PRIMARY KEY,
+    vector      BLOB NOT NULL,
+    accessed_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_embeddings_accessed ON embeddings(accessed_at);
+"""
+
+# Puts between two disk size checks
+TRIM_EVERY = 64
+
+
+def cache_key(model_key, text):
+    return hashlib.sha256(f"{model_key}\0{text}".encode('utf-8')).hexdigest()
+
+
+class SummaryEmbeddingCache:
+    """In-process LRU of summary embeddings with an optional shared SQLite tier."""
+
+    def __init__(self, memory_items=1024, disk_path=None, disk_max_mb=64):
+        self.memory_items = memory_items
+        self.disk_path = disk_path
+        self.disk_max_bytes = int(disk_max_mb * 1024 * 1024)
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._puts = 0
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "disk_evictions": 0, "disk_errors": 0}
+
+    # ---------- disk tier ----------
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.disk_path) or '.', exist_ok=True)
+            conn = sqlite3.connect(self.disk_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _disk_get(self, key):
+        conn = self._conn()
+        row = conn.execute("SELECT vector FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        conn.execute("UPDATE embeddings SET accessed_at = ? WHERE key = ?", (int(time.time() * 1000), key))
+        return np.frombuffer(row[0], dtype=np.float32)
+
+    def _disk_put(self, key, vector):
+        conn = self._conn()
+        conn.execute("INSERT OR REPLACE INTO embeddings (key, vector, accessed_at) VALUES (?, ?, ?)",
+                     (key, vector.tobytes(), int(time.time() * 1000)))
+        with self._lock:
+            self._puts += 1
+            trim = self._puts % TRIM_EVERY == 0
+        if trim:
+            self._trim_disk(conn)
+
+    def _trim_disk(self, conn):
+        """Evict least recently used rows until the table is back under the size limit."""
+        size, count = conn.execute("SELECT COALESCE(SUM(LENGTH(vector)), 0), COUNT(*) FROM embeddings").fetchone()
+        if size <= self.disk_max_bytes or not count:
+            return
+        # Drop down to 90% so the next few puts do not trigger another trim
+        excess_rows = int(count * (1 - 0.9 * self.disk_max_bytes / size)) + 1
+        conn.execute("DELETE FROM embeddings WHERE key IN "
+                     "(SELECT key FROM embeddings ORDER BY accessed_at LIMIT ?)", (excess_rows,))
+        with self._lock:
+            self._stats["disk_evictions"] += excess_rows
+
+    # ---------- public API ----------
+
+    def get(self, key):
+        """Cached vector for `key`, or None."""
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return vector
+        if self.disk_path:
+            try:
+                vector = self._disk_get(key)
+            except sqlite3.Error as e:
+                print(f"[WARN] Summary cache disk read failed: {e}")
+                vector = None
+                with self._lock:
+                    self._stats["disk_errors"] += 1
+            if vector is not None:
+                self._remember(key, vector)
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+                return vector
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(self, key, vector):
+        vector = np.ascontiguousarray(vector, dtype=np.float32)
+        self._remember(key, vector)
+        if self.disk_path:
+            try:
+                self._disk_put(key, vector)
+            except sqlite3.Error as e:
+                print(f"[WARN] Summary cache disk write failed: {e}")
+                with self._lock:
+                    self._stats["disk_errors"] += 1
+
+    def _remember(self, key, vector):
+        with self._lock:
+            self._memory[key] = vector
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_items:
+                self._memory.popitem(last=False)
+
+    def stats(self):
+        """Hit/miss counters for /api/metrics."""
+        with self._lock:
+            s = dict(self._stats)
+            s["memory_items"] = len(self._memory)
+        lookups = s["memory_hits"] + s["disk_hits"] + s["misses"]
+        s["hit_ratio"] = round((s["memory_hits"] + s["disk_hits"]) / lookups, 4) if lookups else 0.0
+        s["disk"] = bool(self.disk_path)
+        return s
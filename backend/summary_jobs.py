@@ -0,0 +1,108 @@
+"""
+Asynchronous Summary Jobs
+Runs summary processing on a bounded thread pool so a slow submission does
+not hold the HTTP worker. Each job is mirrored to `<root>/<job id>.json`,
+which lets any gunicorn worker answer status polls and event streams for
+jobs started by another one.
+
+Job record:
+    {"id", "status": "queued" | "running" | "done" | "error",
+     "created_at", "updated_at", "http_status", "result", "error"}
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from .db_io import atomic_write
+except ImportError:
+    from db_io import atomic_write
+
+FINISHED = ("done", "error")
+
+
+class QueueFull(Exception):
+    """Raised by submit() when `max_pending` jobs are already waiting or running."""
+
+
+class JobManager:
+    """Bounded pool of background jobs with file-backed status records."""
+
+    def __init__(self, root, workers=2, max_pending=16, ttl_seconds=3600):
+        self.root = root
+        self.max_pending = max_pending
+        self.ttl_seconds = ttl_seconds
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="summary-job")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _path(self, job_id):
+        return os.path.join(self.root, f"{job_id}.json")
+
+    def _write(self, job):
+        job["updated_at"] = int(time.time() * 1000)
+        atomic_write(self._path(job["id"]), json.dumps(job), fsync=False)
+
+    def submit(self, fn, *args):
+        """Queue `fn(*args)`, which returns (payload, http_status). Returns a copy of the new job record."""
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise QueueFull()
+            self._pending += 1
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            self._expire()
+            job = {"id": uuid.uuid4().hex, "status": "queued", "created_at": int(time.time() * 1000),
+                   "http_status": None, "result": None, "error": None}
+            self._write(job)
+            snapshot = dict(job)  # the pool thread mutates `job` from here on
+            self._pool.submit(self._run, job, fn, args)
+        except BaseException:
+            # The job never reached the pool, so _run will not release its slot
+            with self._lock:
+                self._pending -= 1
+            raise
+        return snapshot
+
+    def _run(self, job, fn, args):
+        try:
+            job["status"] = "running"
+            self._write(job)
+            payload, status = fn(*args)
+            job.update(status="done", result=payload, http_status=status)
+        except Exception as e:
+            print(f"[JOBS] Job {job['id']} failed: {e}")
+            job.update(status="error", error=str(e), http_status=500)
+        finally:
+            with self._lock:
+                self._pending -= 1
+            self._write(job)
+
+    def get(self, job_id):
+        """Return the job record, or None for unknown (or expired) ids."""
+        if not all(c in "0123456789abcdef" for c in job_id):
+            return None
+        try:
+            with open(self._path(job_id), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def _expire(self):
+        """Delete job records not updated within the TTL."""
+        cutoff = time.time() - self.ttl_seconds
+        for name in os.listdir(self.root):
+            path = os.path.join(self.root, name)
+            try:
+                if name.endswith(".json") and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {"pending": self._pending, "max_pending": self.max_pending}
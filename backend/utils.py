@@ -84,6 +84,43 @@ def utils_preprocess_text(text: str, flg_stemm: bool = False, flg_lemm: bool = T
     text = " ".join(lst_text)
     return text
 
+# ===========================
+# split_sentence_chunks
+# ===========================
+def split_sentence_chunks(text: str, max_words: int, max_chunks: int = None) -> list:
+    """
+    Split text into chunks of whole sentences with at most `max_words` words
+    each, so every chunk fits the encoder's sequence length. Sentences longer
+    than `max_words` are cut into word windows.
+
+    Parameters:
+        text (str): Raw text (before utils_preprocess_text, which drops punctuation).
+        max_words (int): Word budget per chunk.
+        max_chunks (int): Keep only the first chunks. Default is None (all).
+
+    Returns:
+        list: Chunk strings; [text] unchanged when it already fits in one chunk.
+    """
+    if not text or len(text.split()) <= max_words:
+        return [text] if text else []
+
+    chunks, current = [], []
+    for sentence in re.split(r'(?<=[.!?])\s+|\n+', text):
+        words = sentence.split()
+        while len(words) > max_words:
+            if current:
+                chunks.append(" ".join(current))
+                current = []
+            chunks.append(" ".join(words[:max_words]))
+            words = words[max_words:]
+        if current and len(current) + len(words) > max_words:
+            chunks.append(" ".join(current))
+            current = []
+        current.extend(words)
+    if current:
+        chunks.append(" ".join(current))
+    return chunks[:max_chunks] if max_chunks else chunks
+
 # ===========================
 # convert_to_lists
 # ===========================
@@ -168,6 +205,42 @@ def get_cos_sim(a: np.ndarray, b: np.ndarray) -> float:
     return dot_product / (norm_a * norm_b)
 
 
+# ===========================
+# l2_normalize_rows
+# ===========================
+def l2_normalize_rows(matrix) -> np.ndarray:
+    """
+    Scale a vector, or every row of a matrix, to unit L2 norm.
+
+    Parameters:
+        matrix (np.ndarray | list): Vector (dim,) or matrix (n, dim).
+
+    Returns:
+        np.ndarray: float32 array of the same shape; all-zero rows stay zero.
+    """
+    m = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(m, axis=-1, keepdims=True)
+    return m / np.maximum(norms, np.finfo(np.float32).tiny)
+
+
+# ===========================
+# get_cos_sim_matrix
+# ===========================
+def get_cos_sim_matrix(queries, normalized_matrix: np.ndarray) -> np.ndarray:
+    """
+    Cosine similarity of one or many query vectors against every row of a
+    pre-normalized matrix, computed as a single matrix product.
+
+    Parameters:
+        queries (np.ndarray): One vector (dim,) or a batch (n, dim).
+        normalized_matrix (np.ndarray): (m, dim) matrix from l2_normalize_rows.
+
+    Returns:
+        np.ndarray: Similarities of shape (m,) for one query, (n, m) for a batch.
+    """
+    return l2_normalize_rows(queries) @ normalized_matrix.T
+
+
 # ===========================
 # calculate_centroid
 # ===========================
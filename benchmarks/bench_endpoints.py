@@ -0,0 +1,213 @@
+"""
+End-to-End Endpoint Benchmark
+Drives the Flask test client through the summary -> polyline ->
+recommendation pipeline against synthetic databases of 10, 1k and 10k
+polylines and reports per-endpoint latency (p50/p95/p99), throughput and
+peak Python memory (tracemalloc, measured in a separate pass so it does
+not skew the timings).
+
+Endpoints:
+    POST /api/summary/create   (writes one polyline + summary per call)
+    GET  /api/polylines
+    GET  /api/learning-data
+    POST /api/dqn-path
+
+The database lives in a temporary directory (DB_PATH); DB_ENGINE and the
+other DB_* / BERT_BACKEND variables are honoured. Results are written as
+JSON; pass a previous run as --baseline to print the change per endpoint.
+
+Usage:
+    python benchmarks/bench_endpoints.py [--sizes 10,1000,10000] [--requests 50]
+                                         [--output results.json] [--baseline old.json]
+"""
+
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'backend'))
+
+from bench_serialization import make_db
+
+NUM_SESSIONS = 50
+SUMMARY_TEXT = ("Transformers replace recurrence with self-attention so every token can attend to every other token. "
+                "Pre-trained models such as BERT are fine-tuned for downstream tasks, while retrieval augmented "
+                "generation grounds a language model in documents fetched at query time.")
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, math.ceil(q / 100.0 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def seed_database(database, num_polylines, rng):
+    db = make_db(num_polylines, num_sessions=NUM_SESSIONS, seed=rng.randint(0, 2 ** 31))
+    db["polyline_sessions"] = {pid: f"session_{i % NUM_SESSIONS}" for i, pid in enumerate(db["polylines"])}
+    database.reset_db()
+    database.save_db(db)
+
+
+def endpoint_calls(api):
+    """name -> callable(client, rng) issuing one request."""
+    resource_ids = list(api.catalog.by_id)
+
+    def session(rng):
+        return f"session_{rng.randrange(NUM_SESSIONS)}"
+
+    def create_summary(client, rng):
+        return client.post('/api/summary/create', json={
+            'session_id': session(rng), 'title': 'Benchmark summary', 'summary': SUMMARY_TEXT,
+            'visited_resources': rng.sample(resource_ids, min(5, len(resource_ids))),
+        })
+
+    def polylines(client, rng):
+        return client.get('/api/polylines')
+
+    def learning_data(client, rng):
+        return client.get(f'/api/learning-data?session_id={session(rng)}')
+
+    def dqn_path(client, rng):
+        return client.post('/api/dqn-path', json={
+            'session_id': session(rng), 'agent_position': {'x': 10, 'y': 10},
+            'visited_resource_ids': rng.sample(resource_ids, min(3, len(resource_ids))),
+        })
+
+    return {
+        'summary_create': create_summary,
+        'polylines': polylines,
+        'learning_data': learning_data,
+        'dqn_path': dqn_path,
+    }
+
+
+def measure(client, call, requests, warmup, rng):
+    for _ in range(warmup):
+        call(client, rng)
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(requests):
+        t = time.perf_counter()
+        response = call(client, rng)
+        latencies.append((time.perf_counter() - t) * 1000)
+        if response.status_code >= 400:
+            errors += 1
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    # Peak allocation of a few more requests, traced separately
+    tracemalloc.start()
+    for _ in range(min(5, requests)):
+        call(client, rng)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'requests': requests,
+        'errors': errors,
+        'p50_ms': round(percentile(latencies, 50), 3),
+        'p95_ms': round(percentile(latencies, 95), 3),
+        'p99_ms': round(percentile(latencies, 99), 3),
+        'mean_ms': round(sum(latencies) / len(latencies), 3),
+        'throughput_rps': round(requests / elapsed, 2) if elapsed else 0.0,
+        'peak_mem_kb': round(peak / 1024, 1),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _quiet(enabled, devnull):
+    return contextlib.redirect_stdout(devnull) if enabled else contextlib.nullcontext()
+
+
+def run(sizes, requests, warmup, seed, quiet, devnull):
+    rng = random.Random(seed)
+    with _quiet(quiet, devnull):
+        import nlp_api as api
+        import database
+    client = api.app.test_client()
+    calls = endpoint_calls(api)
+    results = {
+        'commit': git_commit(),
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'db_engine': api.get_cache_stats().get('engine'),
+        'bert_backend': api._bert_backend,
+        'requests': requests,
+        'sizes': {},
+    }
+    for size in sizes:
+        print(f"Seeding {size} polylines...", file=sys.stderr)
+        seed_database(database, size, rng)
+        results['sizes'][str(size)] = per_endpoint = {}
+        for name, call in calls.items():
+            with _quiet(quiet, devnull):
+                per_endpoint[name] = measure(client, call, requests, warmup, rng)
+    return results
+
+
+def print_table(results, baseline=None):
+    print(f"engine={results['db_engine']} bert={results['bert_backend']} commit={results['commit']}")
+    print(f"{'polylines':>10} {'endpoint':>15} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'req/s':>9} {'peak KB':>9} {'errors':>7}" + (f" {'p95 vs base':>12}" if baseline else ''))
+    for size, endpoints in results['sizes'].items():
+        for name, r in endpoints.items():
+            line = (f"{size:>10} {name:>15} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+                    f"{r['throughput_rps']:>9.1f} {r['peak_mem_kb']:>9.0f} {r['errors']:>7}")
+            base = (baseline or {}).get('sizes', {}).get(size, {}).get(name)
+            if base and base['p95_ms']:
+                line += f" {(r['p95_ms'] / base['p95_ms'] - 1) * 100:>+11.1f}%"
+            print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the summary/polyline/recommendation endpoints")
+    parser.add_argument("--sizes", default="10,1000,10000", help="Comma-separated polyline counts")
+    parser.add_argument("--requests", type=int, default=50, help="Timed requests per endpoint and size")
+    parser.add_argument("--warmup", type=int, default=3, help="Untimed requests before each measurement")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="JSON results of an earlier run to compare p95 against")
+    parser.add_argument("--verbose", action="store_true", help="Keep the API's console logging")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, 'w') as devnull:
+        os.environ['DB_PATH'] = os.path.join(tmp, 'db.json')
+        os.environ.setdefault('DB_FSYNC', '0')
+        os.environ.setdefault('SUMMARY_JOBS_DIR', os.path.join(tmp, 'jobs'))
+        results = run([int(s) for s in args.sizes.split(',')], args.requests, args.warmup, args.seed,
+                      quiet=not args.verbose, devnull=devnull)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    print_table(results, baseline)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,115 @@
+"""
+Sentence Encoder Inference Benchmark
+Measures load time, resident memory and encode latency of the torch,
+onnx and onnx-int8 backends. Each backend runs in its own subprocess so
+RSS reflects that backend alone.
+
+Usage:
+    python benchmarks/bench_inference.py [--backends torch,onnx,onnx-int8] [--repeat 50] [--threads N]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+sys.path.insert(0, BACKEND_DIR)
+
+MODEL_NAME = 'all-MiniLM-L6-v2'
+ONNX_MODEL_DIR = os.getenv('ONNX_MODEL_DIR', os.path.join(BACKEND_DIR, 'data', 'cache', 'onnx'))
+
+
+def rss_mb():
+    """Current resident set size in MB (Linux /proc; 0 elsewhere)."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def sample_texts():
+    """Summary-sized texts from the resource descriptions."""
+    with open(os.path.join(BACKEND_DIR, 'nlp', 'nlp_resources.json'), 'r', encoding='utf-8') as f:
+        rows = json.load(f)
+    texts = [f"{row.get('name', '')} {row.get('description', '')}".strip() for row in rows]
+    return [t for t in texts if t] or ["Attention lets the decoder look at every encoder state."]
+
+
+def measure(backend, repeat, threads):
+    """Runs inside the child process; returns one result row."""
+    baseline = rss_mb()
+    start = time.perf_counter()
+    if backend == 'torch':
+        import torch
+        from sentence_transformers import SentenceTransformer
+        if threads:
+            torch.set_num_threads(threads)
+        model = SentenceTransformer(MODEL_NAME, device='cpu')
+    else:
+        import onnx_encoder
+        model = onnx_encoder.load(MODEL_NAME, ONNX_MODEL_DIR, quantized=backend == 'onnx-int8', threads=threads)
+    load_s = time.perf_counter() - start
+    loaded = rss_mb()
+
+    texts = sample_texts()
+    model.encode(texts[0])  # warm-up
+    single = []
+    for i in range(repeat):
+        t = time.perf_counter()
+        model.encode(texts[i % len(texts)])
+        single.append((time.perf_counter() - t) * 1000)
+    batch = (texts * (32 // len(texts) + 1))[:32]
+    t = time.perf_counter()
+    model.encode(batch)
+    batch_ms = (time.perf_counter() - t) * 1000
+    single.sort()
+    return {
+        'backend': backend,
+        'load_s': load_s,
+        'rss_model_mb': loaded - baseline,
+        'rss_peak_mb': rss_mb(),
+        'p50_ms': statistics.median(single),
+        'p95_ms': single[min(len(single) - 1, int(len(single) * 0.95))],
+        'batch32_ms': batch_ms,
+    }
+
+
+def run(backends, repeat, threads):
+    print(f"{'backend':>10} {'load s':>8} {'model MB':>9} {'RSS MB':>8} {'p50 ms':>8} {'p95 ms':>8} {'batch32 ms':>11}")
+    for backend in backends:
+        cmd = [sys.executable, os.path.abspath(__file__), '--child', backend, '--repeat', str(repeat)]
+        if threads:
+            cmd += ['--threads', str(threads)]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        lines = [line for line in proc.stdout.splitlines() if line.startswith('{')]
+        if proc.returncode != 0 or not lines:
+            print(f"{backend:>10} failed: {(proc.stderr.strip().splitlines() or ['no output'])[-1]}")
+            continue
+        r = json.loads(lines[-1])
+        print(f"{backend:>10} {r['load_s']:>8.2f} {r['rss_model_mb']:>9.0f} {r['rss_peak_mb']:>8.0f} "
+              f"{r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f} {r['batch32_ms']:>11.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark sentence encoder backends")
+    parser.add_argument("--backends", default="torch,onnx,onnx-int8", help="Comma-separated backends")
+    parser.add_argument("--repeat", type=int, default=50, help="Single-text encodes per backend")
+    parser.add_argument("--threads", type=int, default=0, help="Intra-op threads (0 = library default)")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        print(json.dumps(measure(args.child, args.repeat, args.threads)))
+    else:
+        run(args.backends.split(','), args.repeat, args.threads)
+
+
+if __name__ == '__main__':
+    main()
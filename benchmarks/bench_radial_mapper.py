@@ -0,0 +1,65 @@
+"""
+Radial Mapper Benchmark
+Times polyline_to_2d called once per polyline against
+polylines_to_2d_batch on the whole (N x T) score matrix, and checks that
+both return bit-identical points (including out-of-range and NaN scores).
+
+Usage:
+    python benchmarks/bench_radial_mapper.py [--n 10000] [--topics 18,19] [--repeat 5]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+import numpy as np
+
+from radial_mapper import polyline_to_2d, polylines_to_2d_batch
+
+
+def make_scores(n, topics, seed):
+    """Mostly in-range scores with a few negatives, values above 1 and NaNs mixed in."""
+    rng = np.random.default_rng(seed)
+    scores = rng.uniform(-0.1, 1.1, size=(n, topics))
+    scores[rng.random(size=scores.shape) < 0.001] = np.nan
+    return scores
+
+
+def best_of(fn, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - t)
+    return best, result
+
+
+def run(n, topics_list, repeat, seed):
+    print(f"{'N':>8} {'topics':>7} {'scalar ms':>10} {'batch ms':>9} {'speedup':>8} {'identical':>10}")
+    for topics in topics_list:
+        scores = make_scores(n, topics, seed)
+        rows = scores.tolist()
+        scalar_s, scalar = best_of(lambda: [polyline_to_2d(row, num_topics=topics) for row in rows], repeat)
+        batch_s, batch = best_of(lambda: polylines_to_2d_batch(scores, num_topics=topics), repeat)
+        identical = np.array_equal(np.array(scalar), batch)
+        print(f"{n:>8} {topics:>7} {scalar_s * 1000:>10.1f} {batch_s * 1000:>9.2f} "
+              f"{scalar_s / batch_s:>7.0f}x {str(identical):>10}")
+        if not identical:
+            sys.exit("polylines_to_2d_batch differs from polyline_to_2d")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark scalar vs batch radial mapping")
+    parser.add_argument("--n", type=int, default=10000, help="Polylines per run")
+    parser.add_argument("--topics", default="18,19", help="Comma-separated topic counts")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per measurement (best is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    run(args.n, [int(t) for t in args.topics.split(',')], args.repeat, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+Database Serialization Benchmark
+Compares snapshot size and save/load time of the DB_FORMAT options on
+synthetic databases of 1k, 10k and 100k polylines.
+
+Usage:
+    python benchmarks/bench_serialization.py [--sizes 1000,10000,100000] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+import serializers
+from db_io import atomic_write
+
+NUM_MODULES = 19
+
+
+def make_db(num_polylines, num_sessions=50, seed=0):
+    """A database shaped like production data: one summary per polyline."""
+    rng = random.Random(seed)
+    db = {"users": [], "learning_sessions": {}, "polylines": {}, "summaries": [],
+          "bookmarks": {}, "notes": {}, "lectures": []}
+    for s in range(num_sessions):
+        db["learning_sessions"][f"session_{s}"] = {
+            "position": {"x": rng.randint(0, 19), "y": rng.randint(0, 19)}, "level": rng.randint(0, 5),
+            "totalReward": rng.randint(0, 2000), "visitedResources": [str(rng.randint(1, 19)) for _ in range(8)],
+            "notifications": [],
+        }
+    start = datetime(2024, 1, 1)
+    for i in range(num_polylines):
+        # One summary per second: ids carry a valid YYYYmmdd_HHMMSS like the real ones
+        created = start + timedelta(seconds=i)
+        ts = created.strftime("%Y%m%d_%H%M%S")
+        created_ms = int(created.timestamp() * 1000)
+        session_id = f"session_{i % num_sessions}"
+        db["polylines"][f"polyline_{ts}"] = {
+            "id": f"polyline_{ts}", "name": f"Summary {i}", "timestamp": created_ms,
+            "path": [{"x": rng.randint(0, 19), "y": rng.randint(0, 19)} for _ in range(6)],
+            "color": "rgba(150, 150, 255, 0.4)", "isActive": False,
+            "summary": "Attention lets the decoder look at every encoder state. " * 3,
+            "keywords_found": ["Transformers", "Attention"],
+            "module_scores": [rng.random() for _ in range(NUM_MODULES)],
+            "strengths": ["Attention"], "dominant_topics": ["Transformers"],
+            "assimilation_position": {"x": rng.randint(0, 19), "y": rng.randint(0, 19)},
+        }
+        db["summaries"].append({"id": f"summary_{session_id}_{ts}", "title": f"Summary {i}",
+                                "timestamp": created_ms})
+    return db
+
+
+def best_of(repeat, fn):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes, repeat):
+    formats = [f for f in serializers.FORMATS if serializers.resolve_format(f) == f]
+    print(f"orjson: {'yes' if serializers.orjson else 'no'}, msgpack: {'yes' if serializers.msgpack else 'no'}")
+    print(f"{'polylines':>10} {'format':>13} {'size KB':>10} {'save ms':>10} {'load ms':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            db = make_db(n)
+            for fmt in formats:
+                path = os.path.join(tmp, f"db_{n}_{fmt}")
+                save = best_of(repeat, lambda: atomic_write(path, serializers.dumps(db, fmt), fsync=False))
+
+                def load():
+                    with open(path, 'rb') as f:
+                        serializers.loads(f.read())
+
+                load_s = best_of(repeat, load)
+                print(f"{n:>10} {fmt:>13} {os.path.getsize(path) / 1024:>10.0f} "
+                      f"{save * 1000:>10.1f} {load_s * 1000:>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark db.json serialization formats")
+    parser.add_argument("--sizes", default="1000,10000,100000", help="Comma-separated polyline counts")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per measurement (best is reported)")
+    args = parser.parse_args(argv)
+    run([int(s) for s in args.sizes.split(',')], args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+ONNX Parity Check
+Compares the onnxruntime encoder (fp32 and int8) with the torch
+SentenceTransformer on the module corpus: cosine agreement of the module
+embeddings and of every resource description, and the module_scores each
+text would receive from /api/summary/create. Exits non-zero when a
+backend's cosine agreement falls below MIN_COSINE; backends whose runtime
+is not installed, and the whole check when the torch reference model is
+unavailable, are skipped.
+
+Needs requirements-onnx.txt on top of the backend requirements. The
+database lives in a temporary directory (DB_PATH), so importing the API
+never touches the real db.json.
+
+Usage:
+    python benchmarks/onnx_parity.py [--backends onnx,onnx-int8]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+os.environ['BERT_BACKEND'] = 'torch'
+_db_dir = tempfile.TemporaryDirectory()
+os.environ['DB_PATH'] = os.path.join(_db_dir.name, 'db.json')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+import numpy as np
+
+import nlp_api
+import onnx_encoder
+from utils import get_cos_sim_matrix, l2_normalize_rows
+
+# Lowest acceptable cosine between a backend's embedding and torch's, per text
+MIN_COSINE = {'onnx': 0.999, 'onnx-int8': 0.98}
+
+
+def sample_texts():
+    """Resource descriptions, preprocessed like summaries are."""
+    texts = [f"{r['title']} {r.get('description', '')}" for r in nlp_api.catalog.resources]
+    return [nlp_api.utils_preprocess_text(t, flg_stemm=False, flg_lemm=True, lst_stopwords=nlp_api.stop_words)
+            for t in texts]
+
+
+def row_cosines(a, b):
+    return np.sum(l2_normalize_rows(a) * l2_normalize_rows(b), axis=1)
+
+
+def run(backends):
+    torch_model = nlp_api.get_bert_model()
+    if torch_model is None:
+        print("[SKIP] The torch SentenceTransformer is required as the reference")
+        return []
+    modules, docs = nlp_api.module_documents()
+    texts = sample_texts()
+    ref_modules = l2_normalize_rows(torch_model.encode(docs))
+    ref_texts = torch_model.encode(texts)
+    ref_scores = np.array([nlp_api.bert_module_scores(row) for row in get_cos_sim_matrix(ref_texts, ref_modules)])
+
+    print(f"{len(modules)} module documents, {len(texts)} sample texts")
+    print(f"{'backend':>10} {'module cos min':>15} {'text cos min':>13} {'text cos mean':>14} "
+          f"{'score |d| max':>14} {'score |d| mean':>15} {'top-1 agree':>12}")
+    failures = []
+    for backend in backends:
+        try:
+            model = onnx_encoder.load(nlp_api.BERT_MODEL_NAME, nlp_api.ONNX_MODEL_DIR,
+                                      quantized=backend == 'onnx-int8')
+        except ImportError as e:
+            print(f"{backend:>10} [SKIP] {e}")
+            continue
+        got_modules = l2_normalize_rows(model.encode(docs))
+        got_texts = model.encode(texts)
+        # Scores use the backend's own module matrix, as a server running that backend would
+        got_scores = np.array([nlp_api.bert_module_scores(row) for row in get_cos_sim_matrix(got_texts, got_modules)])
+
+        module_cos = row_cosines(ref_modules, got_modules)
+        text_cos = row_cosines(ref_texts, got_texts)
+        delta = np.abs(got_scores - ref_scores)
+        top_agree = np.mean(np.argmax(got_scores, axis=1) == np.argmax(ref_scores, axis=1))
+        print(f"{backend:>10} {module_cos.min():>15.5f} {text_cos.min():>13.5f} {text_cos.mean():>14.5f} "
+              f"{delta.max():>14.4f} {delta.mean():>15.4f} {top_agree:>12.0%}")
+        worst = min(module_cos.min(), text_cos.min())
+        if worst < MIN_COSINE[backend]:
+            failures.append(f"{backend}: cosine {worst:.5f} < {MIN_COSINE[backend]}")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check ONNX encoder parity with the torch model")
+    parser.add_argument("--backends", default="onnx,onnx-int8", help="Comma-separated: onnx, onnx-int8")
+    args = parser.parse_args(argv)
+    failures = run(args.backends.split(','))
+    if failures:
+        sys.exit("Parity check failed: " + "; ".join(failures))
+
+
+if __name__ == '__main__':
+    main()